@@ -0,0 +1,339 @@
+import logging
+
+from time import perf_counter
+from typing import TYPE_CHECKING
+
+import profiling
+from engine import Move, STOCK
+from frame import Frame
+
+if TYPE_CHECKING:
+    from card import Card
+    from desk import Desk
+
+
+logger = logging.getLogger(__name__)
+
+
+##################################################################
+# Card animations (turned on with --animate).
+#
+# The moved cards fly from their old place to the new one, one frame at
+# a time. Nothing here waits: the game loop calls Animator.tick() on
+# every tick, and it draws a frame only when one is due (the frames that
+# were missed are dropped, the cards just jump further). A frame moves
+# only the cards that fit in FRAME_BUDGET, the rest stay where they are
+# until the next one. If frames take longer than that again and again (a
+# slow terminal or SSH session) the animations are turned off for the
+# rest of the game. Any key or click
+# lands all of the cards first (finish()), so the input never waits.
+##################################################################
+
+FPS = 30
+FRAME_TIME = 1 / FPS
+FRAME_BUDGET = 0.005  # Most time one frame can take (drawing and sending it to the terminal)
+SLOW_FRAMES = 5  # After this many frames over the budget the animations are turned off
+
+MOVE_TIME = 0.15  # How long a moved card flies
+DEAL_TIME = 0.25  # How long a dealt card flies
+DEAL_DELAY = 0.03  # Time between two dealt cards
+AUTO_TIME = 0.1  # How long a card flies to the Foundation pile when the game finishes itself
+
+
+class Flight:
+    """Cards flying to a pile (all of them at the same time, a run keeps its shape).
+
+    Attributes:
+        self.cards: The flying cards (the bottom one first)
+        self.pile: The pile they land on (it's drawn again when they do)
+        self.starts: x, y coords every card flies from
+        self.ends: x, y coords every card lands on
+        self.begins: When the flight starts (perf_counter() time)
+        self.duration: How long the flight takes (in seconds)
+        self.drawn: True if the cards are drawn in the air now
+    """
+
+    def __init__(
+        self,
+        cards: list["Card"],
+        pile,
+        starts: list[tuple[int, int]],
+        ends: list[tuple[int, int]],
+        begins: float,
+        duration: float,
+    ):
+        self.cards = cards
+        self.pile = pile
+        self.starts = starts
+        self.ends = ends
+        self.begins = begins
+        self.duration = duration
+        self.drawn = False
+        for card in cards:
+            card.flying = True
+
+    def progress(self, now: float) -> float:
+        """Returns how far the cards are (0 on the start, 1 when they landed)
+
+        :param now: perf_counter() time
+        """
+        if now <= self.begins:
+            return 0.0
+        return min(1.0, (now - self.begins) / self.duration)
+
+    def draw(self, progress: float):
+        """Drawing the cards in the air (with Card.draw, so they remember where they are).
+
+        :param progress: How far the cards are (see progress())
+        """
+        for card, (start_x, start_y), (end_x, end_y) in zip(self.cards, self.starts, self.ends):
+            x = round(start_x + (end_x - start_x) * progress)
+            y = round(start_y + (end_y - start_y) * progress)
+            card.draw(x, y, card.pile, card.turned)
+        self.drawn = True
+
+    def redraw(self):
+        """Drawing the cards again where they are (a pile was drawn over them)."""
+        for card in self.cards:
+            card.draw(card.x, card.y, card.pile, card.turned)
+
+    def boxes(self) -> list[tuple[int, int, int, int]]:
+        """Returns the boxes (x, y, width, height) the cards are drawn in now"""
+        return [(card.x, card.y, card.width + 1, card.height + 1) for card in self.cards]
+
+    def is_under(self, boxes: list[tuple[int, int, int, int]]) -> bool:
+        """Checking if any of the boxes overlaps the cards (where they are now).
+
+        :param boxes: The boxes (x, y, width, height) drawn after the cards
+        """
+        return any(
+            x < box_x + box_width
+            and box_x < x + width
+            and y < box_y + box_height
+            and box_y < y + height
+            for x, y, width, height in self.boxes()
+            for box_x, box_y, box_width, box_height in boxes
+        )
+
+    def undraw(self) -> list[tuple[int, int, int, int]]:
+        """Clearing the cards from the air.
+
+        Returns the boxes (x, y, width, height) that were cleared.
+        """
+        boxes = []
+        if self.drawn:
+            for card in self.cards:
+                card.undraw()
+                boxes.append((card.x, card.y, card.width + 1, card.height + 1))
+            self.drawn = False
+        return boxes
+
+    def land(self):
+        """Putting the cards on their pile (the pile draws them from now on)."""
+        for card in self.cards:
+            card.flying = False
+
+
+def pile_cards(pile) -> list["Card"]:
+    """Returns the cards of the pile that can be moved (the turned ones of the stock pile)
+
+    :param pile: The pile
+    """
+    if pile.turned_card_list is not None:
+        return pile.turned_card_list
+    return pile.card_list
+
+
+class Animator:
+    """Frame-paced scheduler of the flying cards.
+
+    Attributes:
+        self.desk: The desk the cards are on
+        self.frame: The frame the animations are shown with
+        self.enabled: False if the animations are off (the moves are just drawn)
+        self.flights: Flights that didn't land yet (in the order they were started)
+        self.next_frame: When the next frame is due (perf_counter() time)
+        self.frames: How many frames were drawn
+        self.dropped: How many frames were dropped (late or over the budget)
+        self.slow_frames: How many frames took longer than FRAME_BUDGET
+        self.flight_time: How long moving one flight took in the last frame (to plan the next one)
+    """
+
+    def __init__(self, desk: "Desk", frame: Frame, enabled: bool = True):
+        self.desk = desk
+        self.frame = frame
+        self.enabled = enabled
+        self.flights: list[Flight] = []
+        self.next_frame = 0.0
+        self.frames = 0
+        self.dropped = 0
+        self.slow_frames = 0
+        self.flight_time = 0.0
+
+    def is_idle(self) -> bool:
+        """Checking if no card is flying."""
+        return not self.flights
+
+    def start(self, flight: Flight):
+        """Adding the flight (the next frame draws it)
+
+        :param flight: The new flight
+        """
+        if not self.flights:
+            self.next_frame = perf_counter()
+        self.flights.append(flight)
+
+    def fly_move(self, move: Move, duration: float = MOVE_TIME):
+        """Starting the flight of the cards of the move (made already, but not drawn yet).
+
+        Turning and resetting the stock pile isn't animated.
+
+        :param move: The move
+        :param duration: How long the cards fly
+        """
+        if not self.enabled or move.src == STOCK or move.dst == STOCK:
+            return
+        pile = self.desk.pile_at(move.dst)
+        all_cards = pile_cards(pile)
+        cards = all_cards[-move.count :]
+        if any(card.x is None for card in cards):
+            return  # (never drawn, there's no place to fly from)
+        first = len(all_cards) - move.count
+        starts = [(card.x, card.y) for card in cards]
+        ends = [pile.card_place(first + i) for i in range(move.count)]
+        self.start(Flight(cards, pile, starts, ends, perf_counter(), duration))
+
+    def deal(self):
+        """Starting the flights of all of the Tableau cards from the stock pile (the desk isn't drawn yet).
+
+        The cards go one by one in the order they are dealt (row by row, from the left).
+        """
+        if not self.enabled:
+            return
+        stock = self.desk.stock_pile
+        piles = sorted(self.desk.tableau_piles, key=lambda pile: pile.x)  # From the left
+        begins = perf_counter()
+        for row in range(max(len(pile.card_list) for pile in piles)):
+            for pile in piles:
+                if row >= len(pile.card_list):
+                    continue
+                card = pile.card_list[row]
+                start = [(stock.x, stock.y)]
+                self.start(Flight([card], pile, start, [pile.card_place(row)], begins, DEAL_TIME))
+                begins += DEAL_DELAY
+
+    def wait_time(self) -> float | None:
+        """Returns how long the game loop can wait for input before the next frame (None if there are no flights)"""
+        if not self.flights:
+            return None
+        return max(0.0, self.next_frame - perf_counter())
+
+    def tick(self) -> bool:
+        """Drawing and showing the next frame if it's due.
+
+        Returns True if a frame was shown.
+        """
+        if not self.flights:
+            return False
+        started = perf_counter()
+        if started < self.next_frame:
+            return False
+        # The frames that should have been shown since are dropped
+        late = int((started - self.next_frame) / FRAME_TIME)
+        self.dropped += late
+        self.next_frame += (late + 1) * FRAME_TIME
+
+        self.draw_frame(started, started + FRAME_BUDGET)
+        self.frame.mark_changed()
+        self.frame.end()
+        self.frames += 1
+
+        elapsed = perf_counter() - started
+        profiling.record("animation_frame", elapsed)
+        if elapsed > FRAME_BUDGET:
+            self.slow_frames += 1
+            if self.slow_frames >= SLOW_FRAMES:
+                logger.info(f"Animations are too slow here ({elapsed * 1000:.1f} ms a frame), turned off")
+                self.enabled = False
+                self.finish()
+        return True
+
+    def draw_frame(self, now: float, deadline: float):
+        """Moving the flying cards to their places in this frame.
+
+        Only the flights that fit before the deadline move (one at least), it's
+        planned with the time a flight took in the last frame, the repairs
+        included. Their old places (and the landed cards) are cleared and the
+        piles there drawn again, then every flight is drawn in the order they
+        started (so the newer ones are on the top): the moving ones in their
+        new places, the others only if something under them was drawn over
+        them (they stay where they are until the next frame).
+
+        :param now: The time of the frame (perf_counter() time)
+        :param deadline: The frame should be drawn before this time
+        """
+        started = perf_counter()
+        landed = []
+        moving = []
+        late = False  # True if some flights wait for the next frame
+        for flight in self.flights:
+            if flight.progress(now) >= 1.0:
+                landed.append(flight)
+            elif now < flight.begins:
+                continue  # (not in the air yet)
+            elif late or (moving and started + self.flight_time * (len(moving) + 1) > deadline):
+                late = True
+            else:
+                moving.append(flight)
+        if late:
+            self.dropped += 1
+
+        cleared = []
+        for flight in landed + moving:
+            cleared.extend(flight.undraw())
+        for flight in landed:
+            flight.land()
+        self.flights = [flight for flight in self.flights if flight not in landed]
+        painted = self.repair(cleared, [flight.pile for flight in landed])
+
+        for layer, flight in enumerate(self.flights):
+            if flight in moving:
+                flight.draw(flight.progress(now))
+            elif flight.drawn and flight.is_under([box for other, box in painted if other < layer]):
+                flight.redraw()
+            else:
+                continue
+            painted.extend((layer, box) for box in flight.boxes())
+        if moving:
+            self.flight_time = (perf_counter() - started) / len(moving)
+
+    def repair(self, boxes: list[tuple[int, int, int, int]], piles: list) -> list[tuple]:
+        """Drawing again the piles the cleared boxes were on (and the piles cards landed on).
+
+        Returns what was drawn over: (-1, box) for every cleared box and drawn pile.
+
+        :param boxes: The cleared boxes (x, y, width, height)
+        :param piles: Piles that have to be drawn anyway
+        """
+        desk = self.desk
+        painted = [(-1, box) for box in boxes]
+        for pile in desk.foundation_piles + desk.tableau_piles + [desk.stock_pile]:
+            if pile in piles or any(pile.overlaps(*box) for box in boxes):
+                pile.draw()
+                painted.append((-1, (pile.x, pile.y, pile.drawn_width, pile.drawn_rows)))
+        return painted
+
+    def finish(self):
+        """Landing all of the cards right away (before the input is handled)."""
+        if not self.flights:
+            return
+        boxes = []
+        for flight in self.flights:
+            boxes.extend(flight.undraw())
+            flight.land()
+        self.repair(boxes, [flight.pile for flight in self.flights])
+        self.flights = []
+        self.frame.mark_changed()
+
+    def report(self) -> str:
+        return f"frames: {self.frames}, dropped: {self.dropped}, over the budget: {self.slow_frames}"
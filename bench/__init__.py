@@ -0,0 +1,9 @@
+"""Benchmarks of the drawing and click handling, run with `python -m bench`.
+
+Everything is drawn into FakeWindow (an in-memory curses.window that counts
+the calls and the written bytes), the results are compared to baseline.json.
+Only the counts decide if the run fails, the times are different on every
+machine (they're checked too with --timings).
+"""
+
+from bench.fakewindow import FakeWindow, fake_curses
@@ -0,0 +1,92 @@
+import os
+import sys
+import json
+import logging
+import argparse
+
+from bench.suite import run_all
+
+
+logger = logging.getLogger(__name__)
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+TIMING_UNITS = ("_us", "_ms")  # Metrics named like this are wall-clock times
+
+
+def is_timing(name: str) -> bool:
+    """Checking if the metric is a time (it depends on the machine, the counts don't).
+
+    :param name: Name of the metric
+    """
+    return name.endswith(TIMING_UNITS)
+
+
+def compare(results: dict, baseline: dict, tolerance: float, timings: bool = False) -> list[str]:
+    """Printing the results next to the baseline, returns the metrics that got worse.
+
+    :param results: Metric name -> value of this run
+    :param baseline: Metric name -> value of the baseline run
+    :param tolerance: How much worse (0.25 is 25 %) a metric can get before it counts
+    :param timings: True if the times count too (the baseline was saved on this machine)
+    """
+    worse = []
+    print(f"{'metric':<22}{'now':>12}{'baseline':>12}{'change':>10}")
+    for name, value in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<22}{value:>12.2f}{'-':>12}")
+            continue
+        change = (value - base) / base if base else 0.0
+        flag = ""
+        if change > tolerance:
+            if timings or not is_timing(name):
+                flag = "  worse"
+                worse.append(name)
+            else:
+                flag = "  (slower, not checked)"
+        print(f"{name:<22}{value:>12.2f}{base:>12.2f}{change:>+10.1%}{flag}")
+    return worse
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m bench",
+        description="Benchmark the drawing and click handling against a fake curses window.",
+    )
+    parser.add_argument("--baseline", default=BASELINE, help="baseline JSON file")
+    parser.add_argument("--save", action="store_true", help="save this run as the baseline")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="how much worse a metric can get (0.25 = 25 %%) before the run fails",
+    )
+    parser.add_argument(
+        "--timings",
+        action="store_true",
+        help="fail on worse times too (only if the baseline was saved on this machine)",
+    )
+    args = parser.parse_args(argv)
+
+    results = run_all()
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)
+    worse = compare(results, baseline, args.tolerance, args.timings)
+
+    if args.save:
+        with open(args.baseline, "w", encoding="utf-8") as file:
+            json.dump({name: round(value, 3) for name, value in results.items()}, file, indent=2)
+            file.write("\n")
+        print(f"Baseline saved to {args.baseline}", file=sys.stderr)
+        return 0
+    if worse:
+        print(f"Worse than the baseline: {', '.join(worse)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    sys.exit(main())
@@ -0,0 +1,151 @@
+import curses
+import logging
+
+from collections import Counter, deque
+from contextlib import contextmanager
+
+
+logger = logging.getLogger(__name__)
+
+
+class FakeWindow:
+    """In-memory stand-in for curses.window that counts what's drawn.
+
+    Nothing is shown anywhere, every call is just counted (and the length
+    of the written text too). getch() returns the queued events, a mouse
+    event is an (x, y, bstate) tuple (see fake_curses() for getmouse()).
+
+    Attributes:
+        self.rows: Height of the fake screen
+        self.cols: Width of the fake screen
+        self.calls: Method name -> how many times it was called
+        self.bytes_written: How many bytes of text were written (UTF-8)
+        self.events: Keys and mouse events returned by getch()
+        self.mouse: The last mouse event returned by getch()
+    """
+
+    def __init__(self, rows: int = 50, cols: int = 140, events=()):
+        self.rows = rows
+        self.cols = cols
+        self.calls: Counter = Counter()
+        self.bytes_written = 0
+        self.events = deque(events)
+        self.mouse = (0, 0, 0)
+
+    def reset(self):
+        """Zeroing the counters."""
+        self.calls.clear()
+        self.bytes_written = 0
+
+    def writes(self) -> int:
+        """Returns how many calls wrote text"""
+        calls = self.calls
+        return calls["addch"] + calls["addstr"] + calls["addnstr"]
+
+    def _check(self, y: int, x: int):
+        if not (0 <= y < self.rows and 0 <= x < self.cols):
+            raise curses.error("fake window: out of the screen")
+
+    # Drawing
+    def addch(self, y, x, ch, attr=0):
+        self.calls["addch"] += 1
+        self._check(y, x)
+        self.bytes_written += len(ch.encode()) if isinstance(ch, str) else 1
+
+    def addstr(self, y, x, text, attr=0):
+        self.calls["addstr"] += 1
+        self._check(y, x)
+        self.bytes_written += len(text.encode())
+
+    def addnstr(self, y, x, text, n, attr=0):
+        self.calls["addnstr"] += 1
+        self._check(y, x)
+        self.bytes_written += len(text[:n].encode())
+
+    def chgat(self, y, x, num, attr=0):
+        self.calls["chgat"] += 1
+        self._check(y, x)
+
+    # Screen updates
+    def refresh(self):
+        self.calls["refresh"] += 1
+
+    def noutrefresh(self):
+        self.calls["noutrefresh"] += 1
+
+    def clear(self):
+        self.calls["clear"] += 1
+
+    def erase(self):
+        self.calls["erase"] += 1
+
+    # Input
+    def timeout(self, delay):
+        self.calls["timeout"] += 1
+
+    def nodelay(self, flag):
+        self.calls["nodelay"] += 1
+
+    def getch(self) -> int:
+        self.calls["getch"] += 1
+        if not self.events:
+            return ord("q")
+        event = self.events.popleft()
+        if isinstance(event, tuple):
+            self.mouse = event
+            return curses.KEY_MOUSE
+        return event
+
+    def getmaxyx(self) -> tuple[int, int]:
+        return self.rows, self.cols
+
+
+@contextmanager
+def fake_curses(window: FakeWindow):
+    """Replacing the curses functions that need a terminal while benchmarking.
+
+    Color pairs get the same attributes as in curses (number << 8),
+    doupdate() is counted on the window and getmouse() returns the
+    window's last mouse event.
+
+    :param window: The fake window
+    """
+
+    def doupdate():
+        window.calls["doupdate"] += 1
+
+    def getmouse():
+        x, y, bstate = window.mouse
+        return 0, x, y, 0, bstate
+
+    fakes = {
+        "color_pair": lambda number: number << 8,
+        "init_pair": lambda *args: None,
+        "start_color": lambda: None,
+        "curs_set": lambda visibility: None,
+        "doupdate": doupdate,
+        "getmouse": getmouse,
+    }
+    # The line drawing characters are only there after initscr()
+    for name, char in (
+        ("ACS_HLINE", "-"),
+        ("ACS_VLINE", "|"),
+        ("ACS_ULCORNER", "+"),
+        ("ACS_URCORNER", "+"),
+        ("ACS_LLCORNER", "+"),
+        ("ACS_LRCORNER", "+"),
+    ):
+        if not hasattr(curses, name):
+            fakes[name] = ord(char)
+
+    saved = {name: getattr(curses, name, None) for name in fakes}
+    for name, fake in fakes.items():
+        setattr(curses, name, fake)
+    try:
+        yield window
+    finally:
+        for name, function in saved.items():
+            if function is None:
+                delattr(curses, name)
+            else:
+                setattr(curses, name, function)
@@ -0,0 +1,236 @@
+import random
+import logging
+import tempfile
+
+from contextlib import contextmanager
+from time import perf_counter
+
+import curses
+
+from bench.fakewindow import FakeWindow, fake_curses
+from card import Card, CardColorEnum, CardNumberEnum, CardPileEnum
+from desk import Desk
+from engine import Move, FOUNDATION, WASTE, STOCK
+
+
+logger = logging.getLogger(__name__)
+
+# Deals every benchmark plays (the same ones every run)
+DEALS = range(1, 21)
+
+
+def move_clicks(desk: Desk, move: Move) -> list[tuple[int, int, int]]:
+    """Returns the clicks (x, y, bstate) that make the move on the drawn desk.
+
+    :param desk: The desk (drawn, so the cards know where they are)
+    :param move: A legal move
+    """
+    stock = desk.stock_pile
+    if move.src == STOCK or move.dst == STOCK:
+        return [(stock.x + 1, stock.y + 1, curses.BUTTON1_CLICKED)]
+
+    if move.src == WASTE:
+        source = (stock.waste_x + 1, stock.y + 1)
+    else:
+        # A click picks the lowest face up card under it, so the row is looked up
+        card = desk.tableau_piles[move.src].card_list[-move.count]
+        source = (card.x + 1, card.y)
+        for y in range(card.y, card.y + card.height):
+            hit = desk.hit_index.at(card.x + 1, y)
+            if hit is not None and hit.card is card:
+                source = (card.x + 1, y)
+                break
+
+    pile = desk.pile_at(move.dst)
+    if move.dst < FOUNDATION and pile.card_list:
+        last = pile.card_list[-1]
+        target = (last.x + 1, last.y + 1)
+    else:
+        target = (pile.x + 1, pile.y + 1)
+    return [source + (curses.BUTTON1_CLICKED,), target + (curses.BUTTON1_CLICKED,)]
+
+
+@contextmanager
+def temporary_replays():
+    """Writing the replays of the games into a temporary directory (until the block ends)."""
+    import replay
+
+    saved = replay.REPLAY_DIR
+    with tempfile.TemporaryDirectory() as directory:
+        replay.REPLAY_DIR = directory
+        try:
+            yield directory
+        finally:
+            replay.REPLAY_DIR = saved
+
+
+def percentile(times: list[float], fraction: float) -> float:
+    times = sorted(times)
+    return times[min(len(times) - 1, int(len(times) * fraction))]
+
+
+def bench_deal_setup(results: dict):
+    """Dealing the cards and drawing the desk for the first time."""
+    window = FakeWindow()
+    with fake_curses(window):
+        times = []
+        for deal in DEALS:
+            window.reset()
+            start = perf_counter()
+            desk = Desk(window)
+            desk.initialize(deal)
+            desk.init_draw()
+            times.append(perf_counter() - start)
+    results["deal_setup_ms"] = sum(times) / len(times) * 1000
+    results["deal_setup_calls"] = window.writes() + window.calls["chgat"]
+    results["deal_setup_bytes"] = window.bytes_written
+
+
+def bench_card_draw(results: dict, repeat: int = 20000):
+    """Drawing one face up card (Card.draw)"""
+    window = FakeWindow()
+    with fake_curses(window):
+        card = Card(CardColorEnum.HEARTS, CardNumberEnum.CARD_NUM_10, window)
+        card.draw(40, 9, CardPileEnum.TABLEAU, True)
+        window.reset()
+        start = perf_counter()
+        for _ in range(repeat):
+            card.draw(40, 9, CardPileEnum.TABLEAU, True)
+        elapsed = perf_counter() - start
+    results["card_draw_us"] = elapsed / repeat * 1e6
+    results["card_draw_calls"] = (window.writes() + window.calls["chgat"]) / repeat
+
+
+def bench_pile_draw(results: dict, repeat: int = 2000):
+    """Drawing the longest Tableau pile and the stock pile (TableauPile.draw, StockPile.draw)"""
+    window = FakeWindow()
+    with fake_curses(window):
+        desk = Desk(window)
+        desk.initialize(DEALS[0])
+        desk.init_draw()
+        tableau = max(desk.tableau_piles, key=lambda pile: len(pile.card_list))
+
+        window.reset()
+        start = perf_counter()
+        for _ in range(repeat):
+            tableau.draw()
+        elapsed = perf_counter() - start
+        results["tableau_draw_us"] = elapsed / repeat * 1e6
+        results["tableau_draw_calls"] = (window.writes() + window.calls["chgat"]) / repeat
+
+        window.reset()
+        start = perf_counter()
+        for _ in range(repeat):
+            desk.stock_pile.check_card()  # (turning the card and resetting the pile)
+            desk.stock_pile.draw()
+        elapsed = perf_counter() - start
+        results["stock_draw_us"] = elapsed / repeat * 1e6
+        results["stock_draw_calls"] = (window.writes() + window.calls["chgat"]) / repeat
+
+        window.reset()
+        start = perf_counter()
+        for _ in range(repeat // 10):
+            desk.draw()
+        elapsed = perf_counter() - start
+        results["desk_draw_us"] = elapsed / (repeat // 10) * 1e6
+        results["desk_draw_calls"] = (window.writes() + window.calls["chgat"]) / (repeat // 10)
+
+
+def bench_clicks(results: dict, moves_per_deal: int = 150):
+    """Playing random legal moves by clicking (Desk.on_click) and drawing what changed."""
+    click_times = []
+    frame_times = []
+    frame_calls = 0
+    frame_bytes = 0
+    missed = 0
+    window = FakeWindow()
+    with fake_curses(window):
+        for deal in DEALS:
+            rng = random.Random(deal)
+            desk = Desk(window)
+            desk.initialize(deal)
+            desk.init_draw()
+            for _ in range(moves_per_deal):
+                moves = desk.legal_moves()
+                if not moves:
+                    break
+                move = rng.choice(moves)
+                made = len(desk.history)
+                for x, y, bstate in move_clicks(desk, move):
+                    start = perf_counter()
+                    desk.on_click(x, y, bstate)
+                    click_times.append(perf_counter() - start)
+
+                    window.reset()
+                    start = perf_counter()
+                    desk.draw_changed()
+                    frame_times.append(perf_counter() - start)
+                    frame_calls += window.writes() + window.calls["chgat"]
+                    frame_bytes += window.bytes_written
+                if len(desk.history) == made:
+                    missed += 1
+                    desk.make_move(move)
+                    desk.draw_changed()
+    results["click_p50_us"] = percentile(click_times, 0.5) * 1e6
+    results["click_p99_us"] = percentile(click_times, 0.99) * 1e6
+    results["frame_draw_us"] = sum(frame_times) / len(frame_times) * 1e6
+    results["frame_draw_calls"] = frame_calls / len(frame_times)
+    results["frame_draw_bytes"] = frame_bytes / len(frame_times)
+    if missed:
+        logger.warning(f"bench: {missed} moves weren't made by the clicks")
+
+
+def bench_game_loop(results: dict, clicks: int = 300):
+    """Running game.game() on clicks from the fake window (turning the stock pile)."""
+    import game
+
+    window = FakeWindow()
+    with fake_curses(window), temporary_replays():
+        desk = Desk(window)
+        desk.initialize(DEALS[0])
+        desk.init_draw()
+        x, y, _ = move_clicks(desk, Move(STOCK, WASTE))[0]
+        window.events.extend([(x, y, curses.BUTTON1_CLICKED)] * clicks)
+        window.events.append(ord("q"))
+        window.reset()
+        start = perf_counter()
+        game.game(window, DEALS[0])
+        elapsed = perf_counter() - start
+    events = clicks + 1
+    results["game_event_us"] = elapsed / events * 1e6
+    results["game_event_calls"] = (window.writes() + window.calls["chgat"]) / events
+    results["game_event_bytes"] = window.bytes_written / events
+    results["game_flushes"] = window.calls["doupdate"] + window.calls["refresh"]
+
+
+def bench_new_game(results: dict, repeat: int = 20):
+    """Starting game.game() and quitting it right away (restart to a new deal on the screen)."""
+    import game
+
+    window = FakeWindow()
+    with fake_curses(window), temporary_replays():
+        game.game(window, DEALS[0])  # (the modules game() loads are imported here)
+        start = perf_counter()
+        for deal in DEALS[:repeat]:
+            window.events.append(ord("q"))
+            game.game(window, deal)
+        elapsed = perf_counter() - start
+    results["new_game_ms"] = elapsed / repeat * 1000
+
+
+BENCHMARKS = [
+    bench_deal_setup,
+    bench_card_draw,
+    bench_pile_draw,
+    bench_clicks,
+    bench_game_loop,
+    bench_new_game,
+]
+
+
+def run_all() -> dict:
+    """Returns the results of every benchmark (metric name -> value)"""
+    results = {}
+    for benchmark in BENCHMARKS:
+        benchmark(results)
+    return results
@@ -0,0 +1,92 @@
+import logging
+
+from engine import (
+    GameState,
+    DECK_SIZE,
+    RANK_COUNT,
+    SUIT_COUNT,
+    TABLEAU_COUNT,
+    make_card,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+##################################################################
+# Compact board format (64 bytes per position).
+#
+# Header (12 bytes):
+#   7 bytes - number of cards in each Tableau pile,
+#   4 bytes - number of cards in each Foundation pile (by suit),
+#   1 byte  - number of cards in the stock pile.
+# Board (52 bytes, every card exactly once):
+#   Tableau piles (bottom to top), stock pile, waste pile,
+#   and then the Foundation piles (by suit, ace to the top card).
+#   Face down cards have the FACE_DOWN bit set.
+##################################################################
+
+HEADER_SIZE = TABLEAU_COUNT + SUIT_COUNT + 1
+BOARD_SIZE = HEADER_SIZE + DECK_SIZE
+FACE_DOWN = 0x40
+CARD_MASK = 0x3F
+
+
+def encode(state: GameState) -> bytes:
+    """Packing the game state into BOARD_SIZE bytes (can be hashed and stored).
+
+    :param state: The game state to pack
+    """
+    board = bytearray(BOARD_SIZE)
+    for i, pile in enumerate(state.tableau):
+        board[i] = len(pile)
+    board[TABLEAU_COUNT : TABLEAU_COUNT + SUIT_COUNT] = bytes(state.foundations)
+    board[HEADER_SIZE - 1] = len(state.stock)
+
+    pos = HEADER_SIZE
+    for i, pile in enumerate(state.tableau):
+        hidden = state.hidden[i]
+        for n, card in enumerate(pile):
+            board[pos] = card | FACE_DOWN if n < hidden else card
+            pos += 1
+    for card in state.stock:
+        board[pos] = card
+        pos += 1
+    for card in state.waste:
+        board[pos] = card
+        pos += 1
+    for suit, height in enumerate(state.foundations):
+        for rank in range(1, height + 1):
+            board[pos] = make_card(suit, rank)
+            pos += 1
+    return bytes(board)
+
+
+def decode(board: bytes | bytearray) -> GameState:
+    """Unpacking the game state from the board made by encode().
+
+    :param board: The packed game state
+    """
+    if len(board) != BOARD_SIZE:
+        raise ValueError(f"Board has to be {BOARD_SIZE} bytes, got {len(board)}")
+
+    state = GameState()
+    state.foundations = list(board[TABLEAU_COUNT : TABLEAU_COUNT + SUIT_COUNT])
+    if any(height > RANK_COUNT for height in state.foundations):
+        raise ValueError("Foundation pile can't have more than 13 cards")
+
+    pos = HEADER_SIZE
+    for i in range(TABLEAU_COUNT):
+        end = pos + board[i]
+        pile = board[pos:end]
+        state.tableau[i] = [card & CARD_MASK for card in pile]
+        state.hidden[i] = sum(1 for card in pile if card & FACE_DOWN)
+        pos = end
+
+    stock_end = pos + board[HEADER_SIZE - 1]
+    waste_end = BOARD_SIZE - sum(state.foundations)
+    if waste_end < stock_end:
+        raise ValueError("Board has more cards than the deck")
+    state.stock = list(board[pos:stock_end])
+    state.waste = list(board[stock_end:waste_end])
+    return state
@@ -2,7 +2,7 @@ import curses
 import logging
 
 
-logger = logging.getLogger()
+logger = logging.getLogger(__name__)
 
 
 class Button:
@@ -44,7 +44,6 @@ class Button:
 
         # Drawing the text:
         self.window.addstr(self.y + 1, self.x + 2, self.text)
-        self.window.refresh()
 
     def is_clicked(self, x, y):
         return self.x <= x < self.x + self.width and self.y <= y < self.y + self.height
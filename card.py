@@ -3,8 +3,11 @@ import logging
 
 from enum import Enum
 
+from engine import make_card
+from sprites import get_sprite, card_symbol, draw_rows, color_spans
 
-logger = logging.getLogger()
+
+logger = logging.getLogger(__name__)
 
 
 class CardPileEnum(Enum):
@@ -51,12 +54,16 @@ class Card:
         self.color: Color (or symbol) of the card
         self.num: Number of the card
         self.window:
-        self.width: Width of the card (8)
-        self.height: Width of the card (6 (or 3 if unturned in Tableau))
+        self.width: Width of the card (8, or less on the compact desk, see layout.py)
+        self.height: Width of the card (6 (or 3 if unturned in Tableau), less on the compact desk)
         self.turned: Variable storing the info about the turned status (True or False)
         self.is_active: Variable storing the info about the active status (True or False)
         self.pile: Variable storing the info about in which pile the card is
+        self.code: The card as an int (used by the rules in engine.py)
         self.is_drawn: ???
+        self.covered: True if other cards lie on the active card (only its top rows are visible)
+        self.shown_rows: How many rows of the card show when other cards lie on it
+        self.flying: True while the card is animated (its pile doesn't draw it, see animation.py)
         self.x: x coord of the card
         self.y: y coord of the card
     """
@@ -64,17 +71,17 @@ class Card:
     def __init__(self, color, num, window: curses.window):
         self.color: Enum.name = color
         self.num: Enum.name = num
+        self.code: int = make_card(color.value, num.value)
         self.window = window
         self.width: int = 8
         self.height: int = 6
         self.turned: bool = False
         self.is_active: bool = False
-        curses.init_pair(1, curses.COLOR_RED, curses.COLOR_BLACK)
-        curses.init_pair(2, curses.COLOR_BLACK, curses.COLOR_MAGENTA)
-        curses.init_pair(3, curses.COLOR_WHITE, curses.COLOR_MAGENTA)
-        curses.init_pair(4, curses.COLOR_RED, curses.COLOR_MAGENTA)
         self.pile: CardPileEnum | None = None
         self.drawn: bool = False
+        self.covered: bool = False
+        self.shown_rows: int = 2
+        self.flying: bool = False
         self.x = None
         self.y = None
 
@@ -85,7 +92,7 @@ class Card:
         pile: CardPileEnum | None = None,
         turned: bool = False,
     ):
-        """Draws the card"""
+        """Draws the card (from the pre-rendered sprite, one row at a time)"""
         if not self.pile:
             self.pile = pile
         self.turned = turned
@@ -93,155 +100,38 @@ class Card:
             self.x = x
             self.y = y
         if self.turned or self.pile == CardPileEnum.STOCK:
-            width = self.width
             height = self.height
         else:
-            width = self.width
             height = int(self.height / 2)
 
-        # Draw the card border safely with error handling
-        try:
-            # Draw horizontal lines
-            for i in range(width):
-                try:
-                    self.window.addch(self.y, self.x + i, curses.ACS_HLINE)
-                except curses.error:
-                    pass
-                try:
-                    self.window.addch(self.y + height, self.x + i, curses.ACS_HLINE)
-                except curses.error:
-                    pass
-
-            # Draw vertical lines
-            for i in range(height):
-                try:
-                    self.window.addch(self.y + i, self.x, curses.ACS_VLINE)
-                except curses.error:
-                    pass
-                try:
-                    self.window.addch(self.y + i, self.x + width, curses.ACS_VLINE)
-                except curses.error:
-                    pass
-
-            # Drawing the corners:
-            try:
-                self.window.addch(self.y, self.x, curses.ACS_ULCORNER)
-            except curses.error:
-                pass
-            try:
-                self.window.addch(self.y, self.x + width, curses.ACS_URCORNER)
-            except curses.error:
-                pass
-            try:
-                self.window.addch(self.y + height, self.x, curses.ACS_LLCORNER)
-            except curses.error:
-                pass
-            try:
-                self.window.addch(self.y + height, self.x + width, curses.ACS_LRCORNER)
-            except curses.error:
-                pass
-        except Exception:
-            logger.error("Error drawing card border", exc_info=True)
-
-        # Draw card content
-        if self.turned:
-            card_symbol = self.get_symbol()
-            bottom_symbol_shift = 2
-            if len(card_symbol) > 2:
-                bottom_symbol_shift = 3
-
-            if self.color_check() == "black":
-                if not self.is_active:
-                    self.window.addstr(self.y + 1, self.x + 1, card_symbol)
-                    self.window.addstr(
-                        self.y + self.height - 1,
-                        self.x + self.width - bottom_symbol_shift,
-                        card_symbol,
-                    )
-                else:
-                    self.window.addstr(
-                        self.y + 1, self.x + 1, card_symbol, curses.color_pair(3)
-                    )
-                    self.window.addstr(
-                        self.y + self.height - 1,
-                        self.x + self.width - bottom_symbol_shift,  # - self.move_num,
-                        card_symbol,
-                        curses.color_pair(3),
-                    )
-            else:
-                if not self.is_active:
-                    self.window.addstr(
-                        self.y + 1, self.x + 1, card_symbol, curses.color_pair(1)
-                    )
-                    self.window.addstr(
-                        self.y + self.height - 1,
-                        self.x + self.width - bottom_symbol_shift,  # - self.move_num,
-                        card_symbol,
-                        curses.color_pair(1),
-                    )
-                else:
-                    self.window.addstr(
-                        self.y + 1, self.x + 1, card_symbol, curses.color_pair(4)
-                    )
-                    self.window.addstr(
-                        self.y + self.height - 1,
-                        self.x + self.width - bottom_symbol_shift,
-                        card_symbol,
-                        curses.color_pair(4),
-                    )
-
-        else:
-            try:
-                self.window.addstr(self.y + 1, self.x + 1, "~~~~")
-            except curses.error:
-                pass
-            if not height == int(self.height / 2):
-                try:
-                    self.window.addstr(
-                        self.y + self.height - 1, self.x + self.width - 2, "~~"
-                    )
-                except curses.error:
-                    pass
-        self.window.refresh()
+        sprite = get_sprite(
+            self.num.value, self.color.value, self.turned, self.is_active, height, self.width
+        )
+        rows = draw_rows(self.window, self.y, self.x, sprite.rows)
+        if sprite.fill:
+            self.fill_inside(sprite.fill, min(rows, height))
+        color_spans(self.window, self.y, self.x, sprite.spans, rows)
         self.drawn = True
 
+    def fill_inside(self, attr: int, rows: int):
+        """Changing the attribute of the inside of the card (without drawing it again)
+
+        :param attr: The new attribute
+        :param rows: The inside is changed only above this row
+        """
+        inside = [(row, 1, self.width - 1, attr) for row in range(1, rows)]
+        color_spans(self.window, self.y, self.x, inside, rows)
+
     def is_a_king(self) -> bool:
         return self.num.value == 13
 
     def undraw(self):
-        for i in range(self.height + 1):
-            self.window.move(self.y + i, self.x)
-            self.window.addstr(" " * int(self.width + 1))
-        self.window.refresh()
+        draw_rows(self.window, self.y, self.x, [" " * (self.width + 1)] * (self.height + 1))
         self.drawn = False
 
     def get_symbol(self):
         """Returns a string representation of the card"""
-        # Card number representation
-        if self.num == CardNumberEnum.ACE:
-            num_symbol = "A"
-        elif self.num == CardNumberEnum.JACK:
-            num_symbol = "J"
-        elif self.num == CardNumberEnum.QUEEN:
-            num_symbol = "Q"
-        elif self.num == CardNumberEnum.KING:
-            num_symbol = "K"
-        elif self.num == CardNumberEnum.CARD_NUM_10:
-            num_symbol = "10"
-            # self.move_num = 1
-        else:
-            num_symbol = str(self.num.value)
-
-        # Card suit representation
-        if self.color == CardColorEnum.HEARTS:
-            suit_symbol = "♥"
-        elif self.color == CardColorEnum.DIAMONDS:
-            suit_symbol = "♦"
-        elif self.color == CardColorEnum.CLUBS:
-            suit_symbol = "♣"
-        else:  # SPADES
-            suit_symbol = "♠"
-        return f"{num_symbol}{suit_symbol}"
+        return card_symbol(self.num.value, self.color.value)
 
     def turn(self):
         """Turns the card up.
@@ -262,45 +152,39 @@ class Card:
     def return_pile(self):
         return self.pile.name
 
-    def activate(self):
-        """Makes the card active and marking it red"""
+    def activate(self, covered: bool = False):
+        """Makes the card active and marking it red (only the colors change)
+
+        :param covered: True if other cards lie on this one (only its top row gets marked)
+        """
         try:
             self.is_active = True
-            # Fill the card with colored background - safely
-            for y in range(self.y + 1, self.y + self.height):
-                for x in range(self.x + 1, self.x + self.width):
-                    try:
-                        self.window.addch(y, x, " ", curses.color_pair(2))
-                    except curses.error:
-                        pass
-            self.draw(self.x, self.y, self.pile, self.turned)
-
-            self.window.refresh()
+            self.covered = covered
+            self.set_highlight()
         except Exception as e:
             logger.error(e, exc_info=True)
 
     def deactivate(self):
-        """Restoring the card to it's original state."""
+        """Restoring the card to it's original state (only the colors change)."""
         try:
             self.is_active = False
-            # Clearing the red background
-            for y in range(self.y + 2, self.y + self.height - 1):
-                for x in range(self.x + 2, self.x + self.width - 1):
-                    try:
-                        self.window.addch(y, x, " ")  # Default color (black on white)
-                    except Exception as e:
-                        logger.error(e, exc_info=True)
-            # Redraw the card content to ensure it's visible
-            if self.turned:
-                card_symbol = self.get_symbol()
-                self.window.addstr(self.y + 1, self.x + 1, card_symbol)
-                self.window.addstr(
-                    self.y + self.height - 1, self.x + self.width - 2, card_symbol
-                )
-            self.redraw()
+            self.set_highlight()
         except Exception as e:
             logger.error(e, exc_info=True)
 
+    def set_highlight(self):
+        """Changing the colors of the drawn card to match its active status."""
+        if self.turned or self.pile == CardPileEnum.STOCK:
+            height = self.height
+        else:
+            height = int(self.height / 2)
+        rows = self.shown_rows if self.covered else height
+        sprite = get_sprite(
+            self.num.value, self.color.value, self.turned, self.is_active, height, self.width
+        )
+        self.fill_inside(sprite.fill, rows)
+        color_spans(self.window, self.y, self.x, sprite.spans, rows)
+
     def is_clicked(self, x, y) -> bool:
         """Checking if the card is clicked
 
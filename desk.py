@@ -1,13 +1,31 @@
 import curses
-import random
-import itertools
 import logging
 
+import board
+import profiling
+from hitmap import HitIndex
+from history import History
+from layout import Layout, get_layout
+from locations import LocationIndex
 from piles import TableauPile, FoundationPile, StockPile
 from card import Card, CardColorEnum, CardNumberEnum, CardPileEnum
+from engine import (
+    GameState,
+    Move,
+    MoveCache,
+    FOUNDATION,
+    WASTE,
+    STOCK,
+    RANK,
+    SUIT,
+    DECK_SIZE,
+    make_card,
+    random_deal,
+    shuffled_deck,
+)
 
 
-logger = logging.getLogger()
+logger = logging.getLogger(__name__)
 
 
 class Desk:
@@ -19,8 +37,20 @@ class Desk:
         self.stock_pile: Stock pile object
         self.active_card: Card object that is active (not more than one)
         self.window: The window in which everything is drawn.
+        self.state: The headless game state (engine.GameState), all of the rules run on it.
+                    The piles only show what's in there.
         self.mouse_x: mouse x coord on click
         self.mouse_y: mouse y coord on click
+        self.changed_piles: Piles changed since they were last drawn
+        self.hit_index: Index from a screen cell to the pile and card there (for clicks)
+        self.move_cache: Legal moves of the game state (see legal_moves())
+        self.locations: Index from a card (its code) to its pile, position and face up status
+        self.history: Moves that can be undone and redone
+        self.deal_number: The number of the deal (the seed of the shuffle, None if the state was loaded)
+        self.replay: Writer of the replay file the moves are recorded in (None if they aren't)
+        self.moves_made: How many moves the player made (undone and redone ones too, for the stats)
+        self.stock_passes: How many times the stock pile was reset (for the stats)
+        self.layout: Where the piles are and how big the cards are (see layout.py)
 
     """
 
@@ -29,27 +59,56 @@ class Desk:
         self.foundation_piles = []
         self.tableau_piles = []
         self.active_card = []
+        self.changed_piles = []
+        self.hit_index = HitIndex()
+        self.deal_number = None
+        self.replay = None
+        self.moves_made = 0
+        self.stock_passes = 0
+        self.layout: Layout | None = None
 
-    def initialize(self):
-        """Initializing all of the desk's content."""
+    def initialize(self, deal_number: int | None = None):
+        """Initializing all of the desk's content.
 
-        # Initialize all cards
+        :param deal_number: The number of the deal (a random one if it's None)
+        """
+
+        # Shuffling and dealing the cards (headless), the same number gives the same deal
+        if deal_number is None:
+            deal_number = random_deal()
+        self.deal_number = deal_number
+        logger.info("Deal #%d", deal_number)
+        self.load_state(GameState.deal(shuffled_deck(deal_number)))
+
+    def load_state(self, state: GameState):
+        """Making all of the cards and piles show the game state.
+
+        :param state: The game state to show
+        """
+        self.state = state
+        self.move_cache = MoveCache(state)
+        self.locations = LocationIndex(state)  # (checks that no card went missing too)
+        self.history = History()
+        self.moves_made = 0
+        self.stock_passes = 0
+        self.active_card = None
+        self.changed_piles = []
+
+        # Initialize all cards (self.cards[code] is the card with that code)
         self.cards = [
-            Card(color, num, self.window)
-            for color, num in itertools.product(CardColorEnum, CardNumberEnum)
+            Card(CardColorEnum(SUIT[code]), CardNumberEnum(RANK[code]), self.window)
+            for code in range(DECK_SIZE)
         ]
-        random.shuffle(self.cards)  # Shuffling the cards
-
-        # Making these cards group for Tableau and Stock piles.
-        self.tableau_cards = self.cards[:28]
-        self.stock_cards = self.cards[28:]
-        logger.debug(
-            f"Cards in Tableau: {len(self.tableau_cards)}, Cards in StockPile: {len(self.stock_cards)}"
-        )
+        if logger.isEnabledFor(logging.DEBUG):  # (counting the cards only if it's logged)
+            logger.debug(
+                "Cards in Tableau: %d, Cards in StockPile: %d",
+                sum(len(pile) for pile in state.tableau),
+                len(state.stock),
+            )
 
         # Initialize all classes
         # 7 TableauPile instances
-        self.initialize_tableau(self.tableau_cards)
+        self.initialize_tableau(state)
 
         # 4 FoundationPile instances
         self.foundation_hearts = FoundationPile(self.window, CardColorEnum.HEARTS)
@@ -63,22 +122,71 @@ class Desk:
             self.foundation_clubs,
             self.foundation_spades,
         ]
+        for pile in self.foundation_piles:
+            suit = pile.color.value
+            for rank in range(1, state.foundations[suit] + 1):
+                card = self.cards[make_card(suit, rank)]
+                card.turned = True
+                card.change_piles(CardPileEnum.FOUNDATIONS)
+                pile.card_list.append(card)
 
         # 1 StockPile instance
-        self.stock_pile = StockPile(self.stock_cards, self.window)
+        self.stock_pile = StockPile([self.cards[code] for code in state.stock], self.window)
+        self.stock_pile.turned_card_list = [self.cards[code] for code in state.waste]
+        for card in self.stock_pile.card_list:
+            card.change_piles(CardPileEnum.STOCK)
+        for card in self.stock_pile.turned_card_list:
+            card.turned = True
+            card.change_piles(CardPileEnum.STOCK)
 
-    def initialize_tableau(self, cards: list[Card]):
+        self.apply_layout(get_layout(*self.window.getmaxyx()))
+
+    def apply_layout(self, layout: Layout):
+        """Putting the piles and cards where the layout says (nothing gets drawn).
+
+        :param layout: The layout of the screen (see layout.py)
+        """
+        self.layout = layout
+        for card in self.cards:
+            card.width = layout.card_width
+            card.height = layout.card_height
+        for pile in self.foundation_piles:
+            pile.place(layout.foundation_x[pile.color.value], layout.top_y, layout)
+        for i, pile in enumerate(self.tableau_piles):
+            pile.place(layout.tableau_x[i], layout.tableau_y, layout)
+        self.stock_pile.place(layout.stock_x, layout.top_y, layout)
+
+        # Every cell of the screen belongs to something else now
+        self.hit_index = HitIndex(
+            self.tableau_piles + self.foundation_piles + [self.stock_pile]
+        )
+
+    def initialize_tableau(self, state: GameState):
         """Initializing Tableau
 
-        :param cards: The card list from which the Tableau is initialized
+        :param state: The game state from which the Tableau is initialized
         """
-        for i in range(7, 0, -1):
-            lasted_cards = cards[:i]
-            logger.debug("tableau_cards changed")
-            cards = cards[i:]
-            current_pile = TableauPile(lasted_cards, 28 + 12 * i, self.window)
+        self.tableau_piles = []
+        for i, codes in enumerate(state.tableau):
+            lasted_cards = [self.cards[code] for code in codes]
+            for n, card in enumerate(lasted_cards):
+                card.turned = n >= state.hidden[i]
+                card.change_piles(CardPileEnum.TABLEAU)
+            current_pile = TableauPile(lasted_cards, self.window)
             self.tableau_piles.append(current_pile)
 
+    def to_board(self) -> bytes:
+        """Returns the desk's game state packed into a compact board (see board.py)"""
+        return board.encode(self.state)
+
+    def load_board(self, packed: bytes):
+        """Making the desk show the game state from a compact board (see board.py)
+
+        :param packed: The board made by to_board() (or board.encode())
+        """
+        self.deal_number = None
+        self.load_state(board.decode(packed))
+
     def init_draw(self):
         """Drawing the desk's content (for the first time only)"""
         # Drawing the Foundation piles
@@ -92,6 +200,7 @@ class Desk:
         # Drawing the Stock pile
         self.stock_pile.init_draw()
 
+    @profiling.timed("draw")
     def draw(self):
         for pile in self.foundation_piles:
             pile.draw()
@@ -100,25 +209,33 @@ class Desk:
             pile.draw()
 
         self.stock_pile.draw()
+        self.changed_piles = []
+
+    @profiling.timed("draw_changed")
+    def draw_changed(self):
+        """Drawing again only the piles that changed (after clearing their old place)"""
+        for pile in self.changed_piles:
+            pile.undraw()
+        for pile in self.changed_piles:
+            pile.draw()
+        self.changed_piles = []
+
+    def mark_changed(self, pile):
+        """Remembering that the pile has to be drawn again.
 
+        :param pile: The pile that changed
+        """
+        if pile not in self.changed_piles:
+            self.changed_piles.append(pile)
+        self.hit_index.invalidate(pile)
+
+    @profiling.timed("on_click")
     def on_click(self, mouse_x, mouse_y, event) -> bool:
         """Contains (and does) all of the things that are needed on click.
 
         :param mouse_x: The new x coord of the mouse
         :param mouse_y: The new y coord of the mouse
         """
-        if (
-            len(self.stock_cards)
-            + len(self.tableau_cards)
-            + len(self.stock_pile.turned_card_list)
-            < 52
-        ):
-            logger.error(
-                f"""Hm, I think some card went missing...
-                   stock cards: {len(self.stock_cards)}; 
-                   stock turned cards: {len(self.stock_pile.turned_card_list)} 
-                   tableau cards: {len(self.tableau_cards)};"""
-            )
         # Changing mouse position
         self.mouse_x = mouse_x
         self.mouse_y = mouse_y
@@ -130,76 +247,207 @@ class Desk:
             return False
         return self.check_stockpile(event)
 
+    @profiling.timed("try_activate_some_card")
     def try_activate_some_card(self) -> bool:
         """Tries activating a card and returning bool (True is activated, False if not)."""
         if self.active_card:
             return False
-        for pile in self.tableau_piles:
-            ac = pile.iterate_and_activate(self.mouse_x, self.mouse_y)
-            if ac:
-                self.active_card = ac
-                self.active_card_pile = pile
-                return True
-        ac = self.stock_pile.try_activate(self.mouse_x, self.mouse_y)
-        if ac:
-            self.active_card = ac
-            self.active_card_pile = self.stock_pile
-            return True
-        return False
+        hit = self.hit_index.at(self.mouse_x, self.mouse_y)
+        if hit is None or hit.card is None:
+            return False
+        hit.card.activate(covered=hit.covered)
+        self.active_card = hit.card
+        self.active_card_pile = hit.pile
+        return True
 
+    @profiling.timed("try_moving_active_card")
     def try_moving_active_card(self) -> bool:
         """Tries to move the active card and returning bool (True is moved, False if not)."""
         if not self.active_card:
             return False
 
-        for pile in self.foundation_piles:  # Checking for click in foundation piles
-            if (
-                self.active_card_pile.is_last_card(self.active_card)
-                and self.active_card.return_pile() == "TABLEAU"
-            ) or self.active_card.return_pile() == "STOCK":
-                if pile.is_clicked(self.mouse_x, self.mouse_y):
-                    if pile.can_move(
-                        self.active_card
-                    ):  # Move the card if it's possible
-                        self.active_card_pile.move_to()
-                        pile.move_from_other_pile(self.active_card)
-                        self.active_card.change_piles(CardPileEnum.FOUNDATIONS)
-                        self.try_deactivate_active_card()
-                        return True
-
-        for pile in self.tableau_piles:  # Checking for click in Tableau piles...
-            if pile.pile_or_card_clicked(
-                self.mouse_x, self.mouse_y
-            ):  # ...on the last card
-                if pile.can_move_card(
-                    self.active_card
-                ):  # Try to move the active card(s) on the clicked one.
-                    if (
-                        self.active_card_pile.is_last_card(self.active_card)
-                        or self.active_card.return_pile() == "STOCK"
-                    ):
-                        self.active_card_pile.move_to()
-                        pile.move_from_other_pile(self.active_card)
-                        self.active_card.change_piles(CardPileEnum.TABLEAU)
-                    else:
-                        cards = self.active_card_pile.return_next_cards(
-                            self.active_card
-                        )
-                        for count, card in enumerate(cards):
-                            count = len(cards) - (count + 1)
-                            if count == 0:  # First card (the one that was clicked)
-                                self.active_card_pile.move_to()
-                                pile.move_from_other_pile(card)
-                            else:
-                                self.active_card_pile.move_to()
-                                pile.move_from_other_pile(card)
-                        self.active_card_pile.reactivate_last_card()
-                    self.try_deactivate_active_card()
-                    # if pile.is_empty():         # drawing the empty pile if it's empty.
-                    #     pile.draw_empty()
-                    return True
-        return False
-        # self.window.refresh()  # Refresh to show the active card
+        hit = self.hit_index.at(self.mouse_x, self.mouse_y)
+        if hit is None or not hit.target:  # Not a Foundation pile or the last card of a Tableau pile
+            return False
+
+        code = self.active_card.code
+        src = self.locations.where(code).pile
+        count = self.locations.run_length(code)  # Active card and every card on it
+        return self.make_move(Move(src, self.pile_index(hit.pile), count))
+
+    def make_move(self, move: Move) -> bool:
+        """Making the move (if it's legal) in the game state and on the piles.
+
+        :param move: The move to make
+        """
+        if not self.state.is_legal(move):
+            return False
+        self.count_move(move)
+        flipped = self.state.apply(move)
+        self.locations.update(move)
+        self.history.record(move, flipped)
+        if self.replay:
+            self.replay.move(move)
+        self.move_cache.invalidate(move)
+        self.apply_to_piles(move)
+        self.try_deactivate_active_card()
+        return True
+
+    def count_move(self, move: Move):
+        """Counting the move (before it's made) for the stats.
+
+        :param move: The move that's going to be made
+        """
+        self.moves_made += 1
+        if self.is_stock_reset(move):
+            self.stock_passes += 1
+
+    def is_stock_reset(self, move: Move) -> bool:
+        """Checking if the move (not made yet) puts the whole waste back on the empty stock pile.
+
+        :param move: The move to check
+        """
+        return (
+            move.dst == STOCK
+            and not self.state.stock
+            and move.count == len(self.state.waste)
+        )
+
+    def undo(self) -> bool:
+        """Taking back the last move (returns False if there's nothing to undo)"""
+        step = self.history.undo()
+        if step is None:
+            return False
+        move, flipped = step
+        if self.replay:
+            self.replay.undo()
+        self.try_deactivate_active_card()
+        self.state.unapply(move, flipped)
+        self.locations.update(move)
+        if self.is_stock_reset(move):  # (the state is as it was before the reset)
+            self.stock_passes -= 1
+        self.move_cache.invalidate(move)
+        self.unapply_to_piles(move, flipped)
+        return True
+
+    def redo(self) -> bool:
+        """Making the last undone move again (returns False if there's nothing to redo)"""
+        step = self.history.redo()
+        if step is None:
+            return False
+        move, _ = step
+        if self.replay:
+            self.replay.redo()
+        self.try_deactivate_active_card()
+        self.count_move(move)
+        self.state.apply(move)
+        self.locations.update(move)
+        self.move_cache.invalidate(move)
+        self.apply_to_piles(move)
+        return True
+
+    def legal_moves(self) -> list[Move]:
+        """Returns every move that can be made right now (for hints, bots and such).
+
+        Foundation moves come first, turning the stock pile comes last (see
+        GameState.legal_moves). The moves are cached, after a move only the
+        ones of the piles it touched are checked again.
+        """
+        return self.move_cache.moves()
+
+    def apply_to_piles(self, move: Move):
+        """Doing the same move on the piles that are drawn (the cards are already checked).
+
+        :param move: The move that was made in the game state
+        """
+        if move.src == STOCK or move.dst == STOCK:
+            self.mark_changed(self.stock_pile)
+        if move.src == STOCK:
+            self.stock_pile.check_card()
+            return
+        if move.dst == STOCK:
+            if move.count == 1:  # (Resetting one card is the same)
+                self.stock_pile.uncheck_card()
+            else:  # Resetting the stock pile
+                self.stock_pile.check_card()
+            return
+
+        src_pile = self.pile_at(move.src)
+        dst_pile = self.pile_at(move.dst)
+        self.mark_changed(src_pile)
+        self.mark_changed(dst_pile)
+        # The whole run at once (both piles are drawn again, so there's nothing to repaint here)
+        dst_pile.put_run(src_pile.take_run(move.count))
+
+    def unapply_to_piles(self, move: Move, flipped: bool):
+        """Taking the move back on the piles that are drawn.
+
+        :param move: The move that was taken back in the game state
+        :param flipped: True if the move turned up a face down card
+        """
+        if move.src == STOCK or move.dst == STOCK:
+            self.mark_changed(self.stock_pile)
+            if move.src == STOCK or move.count == 1:
+                if move.src == STOCK:
+                    self.stock_pile.uncheck_card()
+                else:
+                    self.stock_pile.check_card()
+            else:
+                self.stock_pile.undo_reset()
+            return
+
+        src_pile = self.pile_at(move.src)
+        dst_pile = self.pile_at(move.dst)
+        self.mark_changed(src_pile)
+        self.mark_changed(dst_pile)
+        if flipped:
+            src_pile.card_list[-1].turned = False
+        src_pile.put_run(dst_pile.take_run(move.count, turn_up=False))
+
+    def pile_index(self, pile) -> int:
+        """Returns the index of the pile used in the moves (see engine.py)
+
+        :param pile: The pile to check
+        """
+        if pile is self.stock_pile:
+            return WASTE  # Only the turned cards can be moved
+        if pile in self.foundation_piles:
+            return FOUNDATION + pile.color.value
+        return self.tableau_piles.index(pile)
+
+    def pile_at(self, index: int):
+        """Returns the pile from the index used in the moves (see engine.py)
+
+        :param index: The index of the pile
+        """
+        if index >= WASTE:
+            return self.stock_pile
+        if index >= FOUNDATION:
+            for pile in self.foundation_piles:
+                if pile.color.value == index - FOUNDATION:
+                    return pile
+        return self.tableau_piles[index]
+
+    def show_hint(self, move: Move | None) -> bool:
+        """Activating the card the hinted move takes (so the next click can finish it).
+
+        Returns False if there's no card to activate (turning the stock pile or no move).
+
+        :param move: The hinted move
+        """
+        self.try_deactivate_active_card()
+        if move is None or move.src == STOCK or move.dst == STOCK:
+            return False
+        if move.src == WASTE:
+            pile = self.stock_pile
+            card = pile.turned_card_list[-1]
+        else:
+            pile = self.tableau_piles[move.src]
+            card = pile.card_list[-move.count]
+        card.activate(covered=move.count > 1)
+        self.active_card = card
+        self.active_card_pile = pile
+        return True
 
     def try_deactivate_active_card(self) -> bool:
         if self.active_card:
@@ -208,20 +456,36 @@ class Desk:
             return True
         return False
 
+    @profiling.timed("check_stockpile")
     def check_stockpile(self, event):
         if self.stock_pile.is_clicked(self.mouse_x, self.mouse_y):
             if (event & curses.BUTTON1_CLICKED != 0) or (
                 event & curses.BUTTON1_PRESSED
             ) != 0:
-                return self.stock_pile.check_card()
+                if self.state.stock:
+                    return self.make_move(Move(STOCK, WASTE))
+                return self.make_move(Move(WASTE, STOCK, len(self.state.waste)))
             elif (event & curses.BUTTON3_CLICKED != 0) or (
                 event & curses.BUTTON3_PRESSED
             ):
-                return self.stock_pile.uncheck_card()
+                return self.make_move(Move(WASTE, STOCK))
         return False
 
     def is_game_won(self):
-        return (
-            all(pile.is_empty() for pile in self.tableau_piles)
-            and self.stock_pile.is_empty()
-        )
+        return self.state.is_won()
+
+    def can_auto_complete(self) -> bool:
+        """Checking if the rest of the game is only putting the cards on the Foundation piles.
+
+        That's when every card is face up and the stock pile is empty (the lowest
+        card left is always the last card of its pile, so it can always go there).
+        """
+        state = self.state
+        return not state.stock and not state.waste and not any(state.hidden)
+
+    def next_foundation_move(self) -> Move | None:
+        """Returns a move that puts a card on a Foundation pile (None if there's no such move)"""
+        for move in self.legal_moves():  # (Foundation moves come first)
+            if FOUNDATION <= move.dst < WASTE:
+                return move
+        return None
@@ -0,0 +1,488 @@
+import random
+import logging
+
+from typing import NamedTuple
+
+
+logger = logging.getLogger(__name__)
+
+
+##################################################################
+# Headless rules core.
+#
+# Cards are plain ints from 0 to 51 (suit * 13 + rank - 1), with the
+# suit numbered the same way as CardColorEnum and the rank the same way
+# as CardNumberEnum. Nothing in here touches curses, so the rules can be
+# run (and simulated) without a terminal.
+##################################################################
+
+SUIT_COUNT = 4
+RANK_COUNT = 13
+DECK_SIZE = SUIT_COUNT * RANK_COUNT
+
+# Pile indices used by moves.
+# Tableau piles are 0 to 6 (in the same order as Desk.tableau_piles),
+# the Foundation pile of a suit is FOUNDATION + suit.
+TABLEAU_COUNT = 7
+FOUNDATION = 7
+WASTE = 11
+STOCK = 12
+PILE_COUNT = 13
+
+# Lookup tables (faster than doing the math on every rules check)
+SUIT = tuple(card // RANK_COUNT for card in range(DECK_SIZE))
+RANK = tuple(card % RANK_COUNT + 1 for card in range(DECK_SIZE))
+BLACK = tuple(suit % 2 == 1 for suit in SUIT)
+
+
+def make_card(suit: int, rank: int) -> int:
+    """Returns the int representation of a card.
+
+    :param suit: The suit of the card (CardColorEnum value)
+    :param rank: The rank of the card (CardNumberEnum value, 1 to 13)
+    """
+    return suit * RANK_COUNT + rank - 1
+
+
+def new_deck() -> list[int]:
+    """Returns an unshuffled deck (same order as the Card objects in Desk)"""
+    return list(range(DECK_SIZE))
+
+
+# Deal numbers (the seeds of the shuffle) go from 1 to MAX_DEAL (they fit in 4 bytes)
+MAX_DEAL = 2**32 - 1
+
+
+def random_deal() -> int:
+    """Returns a random deal number."""
+    return random.randint(1, MAX_DEAL)
+
+
+def shuffled_deck(seed: int) -> list[int]:
+    """Returns the deck shuffled the same way every time for the seed.
+
+    Every shuffle has its own generator, so the seed (the deal number) is
+    all that's needed to get the same deal again.
+
+    :param seed: The seed of the shuffle
+    """
+    deck = new_deck()
+    random.Random(seed).shuffle(deck)
+    return deck
+
+
+def can_stack_on_foundation(card: int, suit: int, height: int) -> bool:
+    """Checking if the card can be put on the Foundation pile.
+
+    :param card: The card to check
+    :param suit: The suit of the Foundation pile
+    :param height: How many cards are already in the Foundation pile
+    """
+    return SUIT[card] == suit and RANK[card] == height + 1
+
+
+def can_stack_on_tableau(card: int, top: int | None) -> bool:
+    """Checking if the card can be put on the Tableau pile.
+
+    :param card: The card to check
+    :param top: The last card of the Tableau pile (None if it's empty)
+    """
+    if top is None:
+        return RANK[card] == RANK_COUNT  # Only the King can go to an empty pile
+    return RANK[card] == RANK[top] - 1 and BLACK[card] != BLACK[top]
+
+
+class Move(NamedTuple):
+    """One move in the game.
+
+    Moves between the stock and the waste pile turn the cards over,
+    so they reverse the order of the cards:
+        Move(STOCK, WASTE, 1) turns the next card of the stock pile,
+        Move(WASTE, STOCK, n) puts all n waste cards back (or, with n = 1,
+        puts the last turned card back, like the right click does).
+
+    Attributes:
+        self.src: Index of the pile the cards are taken from
+        self.dst: Index of the pile the cards are put on
+        self.count: How many cards are moved
+    """
+
+    src: int
+    dst: int
+    count: int = 1
+
+
+class GameState:
+    """The whole layout of the game, without any drawing.
+
+    Attributes:
+        self.tableau: 7 lists of cards (last one is on the top)
+        self.hidden: How many cards in each Tableau pile are face down
+        self.foundations: How many cards are in each Foundation pile (indexed by suit)
+        self.stock: Cards in the stock pile (last one is on the top)
+        self.waste: Turned cards of the stock pile (StockPile.turned_card_list)
+    """
+
+    __slots__ = ("tableau", "hidden", "foundations", "stock", "waste")
+
+    def __init__(self):
+        self.tableau: list[list[int]] = [[] for _ in range(TABLEAU_COUNT)]
+        self.hidden: list[int] = [0] * TABLEAU_COUNT
+        self.foundations: list[int] = [0] * SUIT_COUNT
+        self.stock: list[int] = []
+        self.waste: list[int] = []
+
+    @classmethod
+    def deal(cls, cards: list[int]) -> "GameState":
+        """Dealing the (already shuffled) cards the same way Desk does it.
+
+        The first 7 cards go to the first Tableau pile, the next 6 to the second
+        one and so on. The rest goes to the stock pile.
+
+        :param cards: The shuffled deck
+        """
+        state = cls()
+        start = 0
+        for i in range(TABLEAU_COUNT):
+            end = start + TABLEAU_COUNT - i
+            state.tableau[i] = list(cards[start:end])
+            state.hidden[i] = end - start - 1  # Only the last card is face up
+            start = end
+        state.stock = list(cards[start:])
+        return state
+
+    def copy(self) -> "GameState":
+        state = GameState.__new__(GameState)
+        state.tableau = [pile[:] for pile in self.tableau]
+        state.hidden = self.hidden[:]
+        state.foundations = self.foundations[:]
+        state.stock = self.stock[:]
+        state.waste = self.waste[:]
+        return state
+
+    def top_card(self, pile: int) -> int | None:
+        """Returns the last card of the pile (None if it's empty)
+
+        :param pile: Index of the pile
+        """
+        if pile < FOUNDATION:
+            cards = self.tableau[pile]
+        elif pile == WASTE:
+            cards = self.waste
+        elif pile == STOCK:
+            cards = self.stock
+        else:
+            height = self.foundations[pile - FOUNDATION]
+            if height:
+                return make_card(pile - FOUNDATION, height)
+            return None
+        if cards:
+            return cards[-1]
+        return None
+
+    def face_up_count(self, pile: int) -> int:
+        """Returns how many cards of the Tableau pile are face up.
+
+        :param pile: Index of the Tableau pile
+        """
+        return len(self.tableau[pile]) - self.hidden[pile]
+
+    def card_count(self) -> int:
+        """Returns the number of cards in the game (should always be 52)"""
+        return (
+            sum(len(pile) for pile in self.tableau)
+            + sum(self.foundations)
+            + len(self.stock)
+            + len(self.waste)
+        )
+
+    def is_won(self) -> bool:
+        return all(height == RANK_COUNT for height in self.foundations)
+
+    def is_legal(self, move: Move) -> bool:
+        """Checking if the move can be made.
+
+        :param move: The move to check
+        """
+        src, dst, count = move
+        if count < 1:
+            return False
+
+        # Stock pile and waste pile
+        if src == STOCK:
+            return dst == WASTE and count == 1 and bool(self.stock)
+        if dst == STOCK:
+            if src != WASTE or count > len(self.waste):
+                return False
+            # Putting one card back or resetting the whole (empty) stock pile
+            return count == 1 or (count == len(self.waste) and not self.stock)
+
+        # Taking the card(s) off
+        if src == WASTE:
+            if count != 1 or not self.waste:
+                return False
+            card = self.waste[-1]
+        elif 0 <= src < FOUNDATION:
+            if count > self.face_up_count(src):
+                return False
+            card = self.tableau[src][-count]
+        else:
+            return False  # Cards can't move out of the Foundation piles
+
+        # Putting the card(s) on
+        if FOUNDATION <= dst < WASTE:
+            suit = dst - FOUNDATION
+            return count == 1 and can_stack_on_foundation(
+                card, suit, self.foundations[suit]
+            )
+        if 0 <= dst < FOUNDATION and dst != src:
+            return can_stack_on_tableau(card, self.top_card(dst))
+        return False
+
+    def apply(self, move: Move) -> bool:
+        """Making the move (it has to be legal).
+
+        Returns True if a face down card in the Tableau got turned up.
+
+        :param move: The move to make
+        """
+        src, dst, count = move
+
+        if src == STOCK or dst == STOCK:
+            if src == STOCK:
+                source, target = self.stock, self.waste
+            else:
+                source, target = self.waste, self.stock
+            run = source[-count:]
+            del source[-count:]
+            run.reverse()
+            target.extend(run)
+            return False
+
+        if src == WASTE:
+            run = [self.waste.pop()]
+        else:
+            source = self.tableau[src]
+            run = source[-count:]
+            del source[-count:]
+
+        if dst < FOUNDATION:
+            self.tableau[dst].extend(run)
+        else:
+            self.foundations[dst - FOUNDATION] += 1
+
+        # Turning up the card under the moved ones
+        if src < FOUNDATION and self.hidden[src] and self.hidden[src] == len(
+            self.tableau[src]
+        ):
+            self.hidden[src] -= 1
+            return True
+        return False
+
+    def unapply(self, move: Move, flipped: bool):
+        """Taking the move back (it has to be the last move made).
+
+        :param move: The move to take back
+        :param flipped: What apply() returned for the move (a face down card got turned up)
+        """
+        src, dst, count = move
+
+        if src == STOCK or dst == STOCK:
+            # Turning the cards over the other way
+            if src == STOCK:
+                source, target = self.waste, self.stock
+            else:
+                source, target = self.stock, self.waste
+            run = source[-count:]
+            del source[-count:]
+            run.reverse()
+            target.extend(run)
+            return
+
+        if flipped:
+            self.hidden[src] += 1
+
+        if dst < FOUNDATION:
+            pile = self.tableau[dst]
+            run = pile[-count:]
+            del pile[-count:]
+        else:
+            suit = dst - FOUNDATION
+            run = [make_card(suit, self.foundations[suit])]
+            self.foundations[suit] -= 1
+
+        if src == WASTE:
+            self.waste.extend(run)
+        else:
+            self.tableau[src].extend(run)
+
+    def pair_move(self, src: int, dst: int) -> Move | None:
+        """Returns the move from the src pile to the dst pile (None if it can't be made).
+
+        There's never more than one such move (only one card of a face up run
+        can fit on the dst pile). FOUNDATION as dst stands for the Foundation
+        pile of the card's suit and (STOCK, WASTE) is turning the stock pile
+        (or resetting it when it's empty).
+
+        :param src: Index of the pile the cards are taken from
+        :param dst: Index of the pile the cards are put on
+        """
+        if src == STOCK:
+            if self.stock:
+                return Move(STOCK, WASTE)
+            if self.waste:
+                return Move(WASTE, STOCK, len(self.waste))
+            return None
+
+        if src == WASTE:
+            if not self.waste:
+                return None
+            run = [self.waste[-1]]
+        else:
+            run = self.tableau[src]
+            if not run:
+                return None
+
+        if dst == FOUNDATION:
+            card = run[-1]
+            suit = SUIT[card]
+            if can_stack_on_foundation(card, suit, self.foundations[suit]):
+                return Move(src, FOUNDATION + suit)
+            return None
+
+        # Face up runs always go down by one, so the card that fits is found
+        # from the ranks (the King for an empty pile)
+        top = self.top_card(dst)
+        rank = RANK_COUNT if top is None else RANK[top] - 1
+        count = rank - RANK[run[-1]] + 1
+        face_up = 1 if src == WASTE else self.face_up_count(src)
+        if 1 <= count <= face_up and can_stack_on_tableau(run[-count], top):
+            return Move(src, dst, count)
+        return None
+
+    def legal_moves(self) -> list[Move]:
+        """Returns all of the moves that can be made right now.
+
+        Foundation moves come first, turning the stock pile comes last.
+        Putting a turned card back on the stock pile is left out
+        (it's just taking back the last move).
+        """
+        moves = []
+        tops = [self.top_card(i) for i in range(TABLEAU_COUNT)]
+
+        # Moves to the Foundation piles
+        for src in range(TABLEAU_COUNT):
+            card = tops[src]
+            if card is not None:
+                suit = SUIT[card]
+                if can_stack_on_foundation(card, suit, self.foundations[suit]):
+                    moves.append(Move(src, FOUNDATION + suit))
+        if self.waste:
+            card = self.waste[-1]
+            suit = SUIT[card]
+            if can_stack_on_foundation(card, suit, self.foundations[suit]):
+                moves.append(Move(WASTE, FOUNDATION + suit))
+
+        # Moves between the Tableau piles (every face up run)
+        for src in range(TABLEAU_COUNT):
+            pile = self.tableau[src]
+            for count in range(1, self.face_up_count(src) + 1):
+                card = pile[-count]
+                for dst in range(TABLEAU_COUNT):
+                    if dst != src and can_stack_on_tableau(card, tops[dst]):
+                        moves.append(Move(src, dst, count))
+
+        # Moves from the waste pile to the Tableau
+        if self.waste:
+            card = self.waste[-1]
+            for dst in range(TABLEAU_COUNT):
+                if can_stack_on_tableau(card, tops[dst]):
+                    moves.append(Move(WASTE, dst))
+
+        # Turning the stock pile
+        if self.stock:
+            moves.append(Move(STOCK, WASTE))
+        elif self.waste:
+            moves.append(Move(WASTE, STOCK, len(self.waste)))
+        return moves
+
+
+# Every (src, dst) pair a move can be made between (Foundation moves first, like GameState.legal_moves)
+MOVE_PAIRS = (
+    [(src, FOUNDATION) for src in range(TABLEAU_COUNT)]
+    + [(WASTE, FOUNDATION)]
+    + [
+        (src, dst)
+        for src in range(TABLEAU_COUNT)
+        for dst in range(TABLEAU_COUNT)
+        if src != dst
+    ]
+    + [(WASTE, dst) for dst in range(TABLEAU_COUNT)]
+    + [(STOCK, WASTE)]
+)
+
+
+def touched_piles(move: Move) -> set[int]:
+    """Returns the piles (as used in MOVE_PAIRS) whose cards the move changed.
+
+    :param move: The move that was made
+    """
+    src, dst, _ = move
+    if src == STOCK or dst == STOCK:
+        return {STOCK, WASTE}
+    return {src, FOUNDATION if dst >= FOUNDATION else dst}
+
+
+# Indices in MOVE_PAIRS of the pairs every pile is part of
+_PAIRS_OF_PILE = {
+    pile: [i for i, pair in enumerate(MOVE_PAIRS) if pile in pair]
+    for pile in list(range(TABLEAU_COUNT)) + [FOUNDATION, WASTE, STOCK]
+}
+
+
+class MoveCache:
+    """Legal moves of a game state, kept between the moves.
+
+    The move of every (src, dst) pair is remembered, a made move only
+    forgets the pairs of the piles it touched, so after a move just a few
+    pairs get checked again instead of all of them.
+
+    Attributes:
+        self.state: The game state (moves have to be reported with invalidate())
+        self.pairs: Move of every pair in MOVE_PAIRS (None if there's no move)
+        self.stale: Indices of the pairs that have to be checked again
+        self.checked: How many pairs were checked (for measuring)
+    """
+
+    def __init__(self, state: GameState):
+        self.state = state
+        self.pairs: list[Move | None] = [None] * len(MOVE_PAIRS)
+        self.stale: set[int] = set(range(len(MOVE_PAIRS)))
+        self.checked = 0
+
+    def invalidate(self, move: Move):
+        """Forgetting the moves of the piles the move touched.
+
+        :param move: The move that was made in the game state
+        """
+        for pile in touched_piles(move):
+            self.stale.update(_PAIRS_OF_PILE[pile])
+
+    def clear(self):
+        """Forgetting all of the moves (the state changed in some other way)."""
+        self.stale = set(range(len(MOVE_PAIRS)))
+
+    def moves(self) -> list[Move]:
+        """Returns all of the moves that can be made.
+
+        Same moves as GameState.legal_moves, the moves between the Tableau
+        piles can just come in a different order.
+        """
+        pairs = self.pairs
+        if self.stale:
+            pair_move = self.state.pair_move
+            for i in self.stale:
+                pairs[i] = pair_move(*MOVE_PAIRS[i])
+            self.checked += len(self.stale)
+            self.stale.clear()
+        return [move for move in pairs if move is not None]
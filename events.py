@@ -0,0 +1,127 @@
+import curses
+import logging
+
+from enum import Enum
+from typing import NamedTuple
+
+import profiling
+
+
+logger = logging.getLogger(__name__)
+
+
+##################################################################
+# Input of the game.
+#
+# Every tick takes all of the keys and clicks waiting in curses (not
+# just one), so a burst of clicks is handled at once and drawn once,
+# nothing waits for the next tick. curses can report one click as a
+# press, a release and a click, only the press is kept (see coalesce()).
+##################################################################
+
+MAX_BATCH = 64  # Most events taken in one tick (the rest waits for the next one)
+
+# Mouse buttons the game uses: the bits of any click of the button -> the press bit
+BUTTONS = (
+    (
+        curses.BUTTON1_PRESSED
+        | curses.BUTTON1_CLICKED
+        | curses.BUTTON1_DOUBLE_CLICKED
+        | curses.BUTTON1_TRIPLE_CLICKED,
+        curses.BUTTON1_PRESSED,
+    ),
+    (
+        curses.BUTTON3_PRESSED
+        | curses.BUTTON3_CLICKED
+        | curses.BUTTON3_DOUBLE_CLICKED
+        | curses.BUTTON3_TRIPLE_CLICKED,
+        curses.BUTTON3_PRESSED,
+    ),
+)
+RELEASES = curses.BUTTON1_RELEASED | curses.BUTTON3_RELEASED
+CLICKS = curses.BUTTON1_CLICKED | curses.BUTTON3_CLICKED  # (reported after the press and release)
+
+
+class InputKindEnum(Enum):
+    KEY = 0
+    CLICK = 1
+
+
+class InputEvent(NamedTuple):
+    """One key or click"""
+
+    kind: InputKindEnum
+    key: int = -1  # The key (KEY events)
+    x: int = 0  # Where the click was (CLICK events)
+    y: int = 0
+    button: int = 0  # curses.BUTTON1_PRESSED or curses.BUTTON3_PRESSED (CLICK events)
+
+
+class InputReader:
+    """Takes all of the waiting input from the window at once, as InputEvents.
+
+    Attributes:
+        self.window: The window the input comes from
+        self.pressed: (x, y, button) of the last press, its click (if curses sends one) is left out
+    """
+
+    def __init__(self, window: curses.window):
+        self.window = window
+        self.pressed: tuple[int, int, int] | None = None
+
+    def read(self, timeout: int) -> list[InputEvent]:
+        """Waiting for input and returning it with everything else that's waiting (in order).
+
+        :param timeout: How long to wait for the first event (in ms, -1 for no limit)
+        """
+        self.window.timeout(timeout)
+        key = self.window.getch()
+        if key == -1:
+            return []
+        self.window.timeout(0)  # The rest is only what's already there
+
+        with profiling.phase("input"):  # (not the wait, only taking what came)
+            raw = []
+            while True:
+                if key == curses.KEY_MOUSE:
+                    try:
+                        _, x, y, _, bstate = curses.getmouse()
+                        raw.append((x, y, bstate))
+                    except curses.error:
+                        pass  # Sometimes getmouse can fail
+                else:
+                    raw.append(key)
+                if len(raw) >= MAX_BATCH:
+                    break
+                key = self.window.getch()
+                if key == -1:
+                    break
+            return self.coalesce(raw)
+
+    def coalesce(self, raw: list) -> list[InputEvent]:
+        """Returns the events without the releases and the repeated clicks.
+
+        :param raw: Keys and (x, y, bstate) of the mouse events, in order
+        """
+        events = []
+        for item in raw:
+            if isinstance(item, int):
+                events.append(InputEvent(InputKindEnum.KEY, key=item))
+                self.pressed = None
+                continue
+
+            x, y, bstate = item
+            if bstate & RELEASES:
+                continue  # The press was the click already
+            for bits, button in BUTTONS:
+                if bstate & bits:
+                    break
+            else:
+                continue  # Moving, the wheel or another button
+
+            if bstate & CLICKS and self.pressed == (x, y, button):
+                self.pressed = None
+                continue  # The same click as the press before it
+            events.append(InputEvent(InputKindEnum.CLICK, x=x, y=y, button=button))
+            self.pressed = (x, y, button) if bstate & button else None
+        return events
@@ -0,0 +1,55 @@
+import curses
+import logging
+
+import profiling
+
+
+logger = logging.getLogger(__name__)
+
+
+class Frame:
+    """Shows everything drawn during one event loop tick at once.
+
+    Cards, piles and buttons only draw into the window (the virtual screen).
+    At the end of the tick end() sends the changes to the terminal with one
+    noutrefresh() + doupdate(), instead of one refresh() per drawn card.
+
+    Attributes:
+        self.window: The window in which everything is drawn.
+        self.changed: True if something was drawn since the last flush
+        self.frames: How many frames (ticks) ended
+        self.flushes: How many times the screen was actually updated
+    """
+
+    def __init__(self, window: curses.window):
+        self.window = window
+        self.changed = True  # Nothing was shown yet
+        self.frames = 0
+        self.flushes = 0
+
+    def mark_changed(self):
+        """Telling the frame that something was drawn."""
+        self.changed = True
+
+    def end(self) -> bool:
+        """Ending the frame, the screen gets updated only if something was drawn."""
+        self.frames += 1
+        if not self.changed:
+            return False
+        with profiling.phase("refresh"):
+            self.window.noutrefresh()
+            curses.doupdate()
+        self.flushes += 1
+        self.changed = False
+        return True
+
+    def flushes_per_frame(self) -> float:
+        if not self.frames:
+            return 0.0
+        return self.flushes / self.frames
+
+    def report(self) -> str:
+        return (
+            f"frames: {self.frames}, flushes: {self.flushes}, "
+            f"flushes per frame: {self.flushes_per_frame():.3f}"
+        )
@@ -2,104 +2,285 @@ import curses
 import logging
 import time
 
-from desk import Desk
+from typing import TYPE_CHECKING
+
+import profiling
+from events import InputReader, InputKindEnum
+from frame import Frame
 from buttons import Button
+from sprites import draw_rows
+
+if TYPE_CHECKING:
+    from animation import Animator
+    from desk import Desk
+    from hints import HintEngine
+    from layout import Layout
+
 
+logger = logging.getLogger(__name__)
 
-logger = logging.getLogger()
+# Rows of the texts next to the desk (the first one is at layout.text_y)
+DEAL_ROW = 0
+TITLE_ROW = 1
+QUIT_ROW = 2
+TIME_ROW = 3
+KEYS_ROW = 4
+HINT_ROW = 5
 
 
 def start_game(window: curses.window):
     """Loading screen and stuff"""
     # Setup
     curses.curs_set(0)  # Hide cursor
-    window.nodelay(True)  # Make getch non-blocking
 
     # Clearing the window
     window.clear()
+    frame = Frame(window)
 
     # Drawing the button
     start_button = Button(10, 10, "Start the game!", window)
     start_button.draw()
     # Instructions
     window.addstr(5, 10, "Click the button to start the game")
-    window.refresh()
+    frame.end()
+    profiling.report_timing("first_frame", time.perf_counter() - profiling.STARTED)
 
+    inputs = InputReader(window)
     while True:
-        try:
-            key = window.getch()
-            if key == curses.KEY_MOUSE:
-                try:
-                    _, mouse_x, mouse_y, _, _ = curses.getmouse()
-                    if start_button.is_clicked(mouse_x, mouse_y):
-                        return
-                except curses.error:
-                    # Sometimes getmouse can fail
-                    pass
-            elif key == ord("q"):  # Allow quitting with 'q'
+        for event in inputs.read(-1):
+            if event.kind == InputKindEnum.CLICK:
+                if start_button.is_clicked(event.x, event.y):
+                    return
+            elif event.key == ord("q"):  # Allow quitting with 'q'
                 raise KeyboardInterrupt()
-        except curses.error:
-            # No input available
-            pass
 
-        time.sleep(0.1)  # Prevent CPU hogging
 
-        window.refresh()
+def game(window: curses.window, deal_number: int | None = None, animate: bool = False):
+    """Main game function (event loop)
 
+    Returns (True if it's won, the time in minutes), or None if the player quit.
 
-def game(window: curses.window):
-    """Main game function (event loop)"""
-    window.clear()
-    # Make sure that nodelay mode is kept from start_game
-    window.nodelay(True)
-    curses.start_color()
-    # Create and draw restart button
-    restart_button = Button(10, 20, "Click me if You lost.", window)
-    restart_button.draw()
+    :param deal_number: The number of the deal to play (a random one if it's None)
+    :param animate: True if the cards fly (and the won game finishes itself)
+    """
+    began = time.perf_counter()
+    # The game's modules are loaded only now, the first screen doesn't need them
+    from animation import Animator, AUTO_TIME
+    from desk import Desk
+    from engine import Move
+    from hints import HintEngine, describe
+    from layout import get_layout
+    from replay import ReplayWriter
+    from stats import GameRecord, get_store
 
+    window.clear()
     desk = Desk(window)
-    desk.initialize()
+    desk.initialize(deal_number)  # (the piles get placed for the window's size)
+    frame = Frame(window)
+    animator = Animator(desk, frame, animate)
+    animator.deal()  # (the Tableau cards fly in, the piles don't draw them until they land)
     desk.init_draw()
+    try:
+        desk.replay = ReplayWriter.for_seed(desk.deal_number)
+    except OSError as e:
+        logger.error(f"Can't record the replay: {e}")
 
-    # Game instructions
-    window.addstr(11, 7, "Solitaire Game")
-    window.addstr(12, 7, "(double) Press 'q' to quit")
+    # Game instructions and the restart button
+    restart_button = draw_texts(window, desk)
+    frame.end()
+    profiling.report_timing("new_deal", time.perf_counter() - began)
+    # The hint is searched for while the player looks at the new deal
+    hints = HintEngine()
+    hints.restart(desk.state)
+    hint_shown = False
+    inputs = InputReader(window)
 
     # Start time.time()
     start_time = time.time()
+    shown_seconds = None
+    input_time = None  # When the last key or click came (for profiling)
+    auto_complete = False  # True while the won game puts the cards on the Foundation piles
     # Game loop
     running = True
 
     while running:  # EVENT LOOP
-        # Show time
-        elapsed_time = (time.time() - start_time) / 60
-        window.addstr(
-            13,
-            7,
-            f"your time: {int(elapsed_time)} minutes {int((elapsed_time % 1) * 60)} seconds",
-        )
+        # Show time (only when the shown value changes)
+        now = time.time()
+        seconds = int(now - start_time)
+        if seconds != shown_seconds:
+            shown_seconds = seconds
+            put_text(window, desk.layout, TIME_ROW, time_text(desk.layout, seconds))
+            frame.mark_changed()
+        # The animation frame (if it's due) and everything drawn in this tick go to the terminal at once
+        animator.tick()
+        frame.end()
+        if input_time is not None:
+            profiling.record("input_to_paint", time.perf_counter() - input_time)
+            input_time = None
+
+        # Wait for input, but not longer than to the next clock change (or animation frame)
+        timeout = start_time + seconds + 1 - now
+        wait = animator.wait_time()
+        if auto_complete and wait is None:
+            wait = 0  # (the next card goes right away)
+        if wait is not None:
+            timeout = min(timeout, wait)
         try:
-            key = window.getch()  # Checking for input
-            if key == ord("q"):  # q for quit
-                running = False
-            elif key == curses.KEY_MOUSE:  # mouse click
-                try:
-                    _, mouse_x, mouse_y, _, event = curses.getmouse()  # get mouse pos
-                    if restart_button.is_clicked(mouse_x, mouse_y):
-                        # Restart the game through the loading screen (important)
-                        return False, elapsed_time
-                    if desk.on_click(mouse_x, mouse_y, event):
-                        window.erase()
-                        desk.draw()
-                        restart_button.draw()
-                except Exception as e:
-                    logger.error(e, exc_info=True)
+            events = inputs.read(max(1, int(timeout * 1000)))
         except Exception as e:
             logger.error(e, exc_info=True)
-        if desk.is_game_won():
-            return True, elapsed_time
-        window.refresh()
-        time.sleep(0.05)  # Prevent CPU hogging
+            events = []
+        if profiling.ENABLED and events:
+            input_time = time.perf_counter()
+        elapsed_time = (time.time() - start_time) / 60
+        moved = False
+
+        # Every waiting key and click, in order (the desk is drawn once after all of them)
+        for event in events:
+            try:
+                animator.finish()  # (the input is about the cards where they land)
+                if event.kind == InputKindEnum.CLICK:
+                    frame.mark_changed()  # (the card can get activated)
+                    if restart_button.is_clicked(event.x, event.y):
+                        # Restart the game through the loading screen (important)
+                        end_game(desk, frame, hints, animator)
+                        get_store().record(
+                            GameRecord.of_desk(desk, False, elapsed_time * 60)
+                        )
+                        return False, elapsed_time
+                    if desk.on_click(event.x, event.y, event.button):
+                        moved = True
+                        animator.fly_move(desk.history.last_move())
+                        auto_complete = animate and desk.can_auto_complete()
+                        hints.restart(desk.state, desk.history.last_move())
+                        hint_shown = clear_hint(window, desk.layout, hint_shown)
+                elif event.key == ord("q"):  # q for quit
+                    running = False
+                    break
+                elif event.key == ord("h"):  # h for hint
+                    move = hints.hint()
+                    desk.show_hint(move)
+                    put_text(window, desk.layout, HINT_ROW, describe(desk.state, move))
+                    hint_shown = True
+                    frame.mark_changed()
+                elif event.key == ord("u"):  # u for undo
+                    move = desk.history.last_move()
+                    if desk.undo():
+                        moved = True
+                        animator.fly_move(Move(move.dst, move.src, move.count))  # (back)
+                        auto_complete = False
+                        hints.restart(desk.state)
+                        hint_shown = clear_hint(window, desk.layout, hint_shown)
+                        frame.mark_changed()
+                elif event.key == ord("r"):  # r for redo
+                    if desk.redo():
+                        moved = True
+                        animator.fly_move(desk.history.last_move())
+                        auto_complete = animate and desk.can_auto_complete()
+                        hints.restart(desk.state)
+                        hint_shown = clear_hint(window, desk.layout, hint_shown)
+                        frame.mark_changed()
+                elif event.key == curses.KEY_RESIZE:
+                    # Everything is drawn again (somewhere else, if the layout changed)
+                    layout = get_layout(*window.getmaxyx())
+                    if layout != desk.layout:
+                        desk.apply_layout(layout)
+                    window.clear()
+                    desk.draw()
+                    restart_button = draw_texts(window, desk)
+                    shown_seconds = None  # (the time gets written again on the next tick)
+                    hint_shown = False
+                    moved = False  # (draw() drew the changed piles already)
+                    frame.mark_changed()
+            except Exception as e:
+                logger.error(e, exc_info=True)
+        if moved:
+            desk.draw_changed()  # Only the piles the moves touched
+
+        # The won game puts the cards on the Foundation piles, one flight at a time
+        # (only with animations, without them the player puts the cards there)
+        while auto_complete and animator.is_idle():
+            move = desk.next_foundation_move()
+            if move is None:
+                auto_complete = False
+                break
+            desk.make_move(move)
+            animator.fly_move(move, AUTO_TIME)
+            hints.restart(desk.state, move)
+            desk.draw_changed()
+            frame.mark_changed()
+
+        if desk.is_game_won() and animator.is_idle():
+            end_game(desk, frame, hints, animator)
+            seconds = time.time() - start_time
+            get_store().record(GameRecord.of_desk(desk, True, seconds))
+            return True, seconds / 60
+    end_game(desk, frame, hints, animator)
+    return None  # The player quit ('q')
+
+
+def clear_hint(window: curses.window, layout: "Layout", hint_shown: bool) -> bool:
+    """Clearing the hint text (it's about the old position after a move).
+
+    Returns the new hint_shown value (False).
+    """
+    if hint_shown:
+        put_text(window, layout, HINT_ROW, "")
+    return False
+
+
+def put_text(window: curses.window, layout: "Layout", row: int, text: str):
+    """Writing one of the texts next to the desk (over the old one, cut off if it doesn't fit).
+
+    :param layout: The layout of the screen (see layout.py)
+    :param row: The row of the text (one of the *_ROW constants)
+    :param text: The text
+    """
+    width = layout.text_width
+    draw_rows(window, layout.text_y + row, layout.text_x, [text[:width].ljust(width)])
+
+
+def time_text(layout: "Layout", seconds: int) -> str:
+    """Returns the text of the game's time (a shorter one on the compact desk)
+
+    :param seconds: How long the game goes
+    """
+    if layout.compact:
+        return f"your time: {seconds // 60}:{seconds % 60:02d}"
+    return f"your time: {seconds // 60} minutes {seconds % 60} seconds"
+
+
+def draw_texts(window: curses.window, desk: "Desk") -> Button:
+    """Drawing the game instructions and the restart button where the desk's layout puts them.
+
+    Returns the restart button.
+    """
+    layout = desk.layout
+    put_text(window, layout, DEAL_ROW, f"Deal #{desk.deal_number}")
+    put_text(window, layout, TITLE_ROW, "Solitaire Game")
+    put_text(window, layout, QUIT_ROW, "(double) Press 'q' to quit")
+    if layout.compact:
+        put_text(window, layout, KEYS_ROW, "'u' undo, 'r' redo, 'h' hint")
+    else:
+        put_text(window, layout, KEYS_ROW, "'u' - undo, 'r' - redo, 'h' - hint")
+
+    restart_button = Button(layout.restart_x, layout.restart_y, "Click me if You lost.", window)
+    try:
+        restart_button.draw()
+    except curses.error:
+        logger.debug("The restart button doesn't fit on the screen")
+    return restart_button
+
+
+def end_game(desk: "Desk", frame: Frame, hints: "HintEngine", animator: "Animator"):
+    """Closing the replay, stopping the hint search and logging the frame stats of the game."""
+    hints.stop()
+    if desk.replay:
+        desk.replay.close()
+        desk.replay = None
+    logger.debug(f"Game frames - {frame.report()}")
+    if animator.frames:
+        logger.debug(f"Animation frames - {animator.report()}")
 
 
 def game_finished(window: curses.window, won: bool, elapsed_time):
@@ -112,6 +293,7 @@ def game_finished(window: curses.window, won: bool, elapsed_time):
 
     play_again_button = Button(10, 10, "Play again?", window)
     quit_button = Button(30, 10, "Quit :c", window)
+    stats_button = Button(45, 10, "Stats", window)
     window.addstr(
         5,
         1,
@@ -120,22 +302,58 @@ def game_finished(window: curses.window, won: bool, elapsed_time):
 
     play_again_button.draw()
     quit_button.draw()
+    stats_button.draw()
+    Frame(window).end()
 
-    running = True
-
-    while running:
-        key = window.getch()
-        if key == curses.KEY_MOUSE:
-            _, mouse_x, mouse_y, _, _ = curses.getmouse()  # get mouse pos
-            if play_again_button.is_clicked(mouse_x, mouse_y):
+    inputs = InputReader(window)
+    while True:
+        for event in inputs.read(-1):  # (only the clicks, not the releases after them)
+            if event.kind != InputKindEnum.CLICK:
+                continue
+            if play_again_button.is_clicked(event.x, event.y):
                 return False
-            elif quit_button.is_clicked(mouse_x, mouse_y):
+            elif quit_button.is_clicked(event.x, event.y):
                 return True
+            elif stats_button.is_clicked(event.x, event.y):
+                stats_screen(window)
+                return game_finished(window, won, elapsed_time)
+
+
+def stats_screen(window: curses.window):
+    """Showing the stats of all of the played games (until the back button is clicked)"""
+    from stats import get_store, report_lines
+
+    window.clear()
+    window.addstr(2, 1, "Your stats")
+    try:
+        lines = report_lines(get_store().summary())
+    except Exception as e:
+        logger.error(f"Can't read the stats: {e}", exc_info=True)
+        lines = ["Can't read the stats, sorry (more in the log)"]
+    for i, line in enumerate(lines):
+        window.addstr(4 + i, 1, line)
+    back_button = Button(10, 6 + len(lines), "Back", window)
+    back_button.draw()
+    Frame(window).end()
+
+    inputs = InputReader(window)
+    while True:
+        for event in inputs.read(-1):
+            if event.kind == InputKindEnum.CLICK and back_button.is_clicked(event.x, event.y):
+                return
+
 
+def run(window, deal_number: int | None = None, animate: bool = False):
+    """Running the games (the first one is the deal from the command line, if there's one)
 
-def run(window):
+    :param animate: True if the cards fly (see animation.py)
+    """
     start_game(window)
     while True:
-        is_won, elapsed_time = game(window)
+        result = game(window, deal_number, animate)
+        if result is None:
+            break  # (main() says goodbye and times the exit)
+        is_won, elapsed_time = result
+        deal_number = None  # The next games get random deals
         if game_finished(window, is_won, elapsed_time):
             break
@@ -0,0 +1,157 @@
+import queue
+import logging
+import threading
+
+from engine import GameState, Move, FOUNDATION, WASTE, STOCK, RANK, SUIT
+from solver import Solver, SolveStatusEnum, ordered_moves
+from sprites import card_symbol
+
+
+logger = logging.getLogger(__name__)
+
+IDLE_DELAY = 0.05  # Seconds without a move before the search starts
+
+
+##################################################################
+# Hints ('h' key in the game).
+#
+# The search runs in one daemon thread (for the whole game) on a copy
+# of the game state, the game only reads the result. Any move (or
+# undo/redo) cancels it and queues the new state, so the input handling
+# never waits for the search, or for a thread to start. The search only
+# starts when the player stops clicking for a moment (IDLE_DELAY), so it
+# doesn't take the GIL from the moves being handled and drawn.
+##################################################################
+
+
+class HintEngine:
+    """Looks for the best next move in a background thread while the player thinks.
+
+    Until the search is done, hint() returns a quick hint (the most promising
+    move, see solver.ordered_moves). The solver searches a copy of the game
+    state in a worker thread, and if it finds a way to win, the first move
+    of that becomes the hint. Making the hinted move keeps the rest of the
+    winning moves, so the next hint needs no search at all.
+
+    Attributes:
+        self.solver: The solver used for the search
+        self.state: The game state the hint is for (the desk's, it's only read)
+        self.move: The next of the winning moves (None if they aren't found yet)
+        self.solved: True if the winning moves were found
+        self.plan: The rest of the winning moves (after self.move)
+        self.cancel: Set to stop the running search
+        self.requests: Searches waiting for the worker, (state, cancel, number) (None stops it)
+        self.thread: The worker thread (None if it's not running)
+        self.lock: Taken while the hint is changed (by the game or by the worker thread)
+        self.searches: How many searches were started (the results of the older ones are thrown away)
+    """
+
+    def __init__(
+        self,
+        max_nodes: int | None = 200_000,
+        max_seconds: float | None = 5.0,
+        max_memory: int | None = 64 * 1024 * 1024,
+    ):
+        self.solver = Solver(max_nodes, max_seconds, max_memory)
+        self.state: GameState | None = None
+        self.move: Move | None = None
+        self.solved = False
+        self.plan: list[Move] = []
+        self.cancel = threading.Event()
+        self.requests: queue.SimpleQueue = queue.SimpleQueue()
+        self.thread: threading.Thread | None = None
+        self.lock = threading.Lock()
+        self.searches = 0
+
+    def restart(self, state: GameState, last_move: Move | None = None):
+        """Throwing away the old hint and searching for a new one (never waits).
+
+        :param state: The game state after the player's last action
+        :param last_move: The move that was made (if it was the hinted one, the winning moves are kept)
+        """
+        with self.lock:
+            self.cancel.set()
+            self.state = state
+            if self.solved and last_move == self.move:
+                self.move = self.plan.pop(0) if self.plan else None
+                if self.move is not None:
+                    return
+
+            self.solved = False
+            self.plan = []
+            self.move = None
+            self.searches += 1
+            self.cancel = threading.Event()
+            self.requests.put((state.copy(), self.cancel, self.searches))
+        if self.thread is None:
+            self.thread = threading.Thread(
+                target=self._work, name="hint-search", daemon=True
+            )
+            self.thread.start()
+
+    def hint(self) -> Move | None:
+        """Returns the hinted move (None if there are no moves left)"""
+        with self.lock:
+            if self.solved or self.state is None:
+                return self.move
+            moves = ordered_moves(self.state)  # The search isn't done yet
+            return moves[0] if moves else None
+
+    def stop(self):
+        """Cancelling the running search and stopping the worker (it stops on its own soon after)."""
+        self.cancel.set()
+        if self.thread is not None:
+            self.requests.put(None)
+            self.thread = None
+
+    def _work(self):
+        while True:
+            request = self.requests.get()
+            # Only the newest search matters, the older ones were cancelled
+            while request is not None and not self.requests.empty():
+                request = self.requests.get()
+            if request is None:
+                return
+            state, cancel, search = request
+            if not cancel.wait(IDLE_DELAY):  # (True if the player moved again)
+                self._search(state, cancel, search)
+
+    def _search(self, state: GameState, cancel: threading.Event, search: int):
+        result = self.solver.solve(state, cancel)
+        logger.debug(
+            "Hint search: %s in %d nodes, %.3f s",
+            result.status.name,
+            result.nodes,
+            result.elapsed,
+        )
+        with self.lock:
+            if cancel.is_set() or search != self.searches:
+                return  # The game went on without waiting for this
+            if result.status == SolveStatusEnum.SOLVED and result.moves:
+                self.plan = result.moves[1:]
+                self.move = result.moves[0]
+                self.solved = True
+
+
+def describe(state: GameState, move: Move | None) -> str:
+    """Returns the hint as text, like "Hint: 10♥ -> J♠".
+
+    :param state: The game state the move is made in
+    :param move: The hinted move (None if there's no move)
+    """
+    if move is None:
+        return "Hint: no moves left"
+    src, dst, count = move
+    if src == STOCK:
+        return "Hint: turn the stock pile"
+    if dst == STOCK:
+        return "Hint: reset the stock pile"
+
+    card = state.waste[-1] if src == WASTE else state.tableau[src][-count]
+    text = f"Hint: {card_symbol(RANK[card], SUIT[card])} -> "
+    if dst >= FOUNDATION:
+        return text + "foundation"
+    top = state.top_card(dst)
+    if top is None:
+        return text + "empty pile"
+    return text + card_symbol(RANK[top], SUIT[top])
@@ -0,0 +1,99 @@
+import logging
+
+from array import array
+
+from engine import Move
+
+
+logger = logging.getLogger(__name__)
+
+
+##################################################################
+# Undo / redo journal.
+#
+# Only what a move changed is kept (not a copy of the desk), packed
+# into one 16 bit number:
+#     bits 0-3   src pile index (see engine.py)
+#     bits 4-7   dst pile index
+#     bits 8-12  how many cards moved (a stock reset moves up to 24)
+#     bit 13     a face down card got turned up by the move
+# A stock reset is Move(WASTE, STOCK, n), so it's known from the piles
+# and the count.
+##################################################################
+
+FLIPPED_BIT = 1 << 13
+
+
+def pack_step(move: Move, flipped: bool) -> int:
+    """Returns the move packed into one number (see above).
+
+    :param move: The move that was made
+    :param flipped: True if a face down card got turned up by the move
+    """
+    src, dst, count = move
+    return src | dst << 4 | count << 8 | (FLIPPED_BIT if flipped else 0)
+
+
+def unpack_step(step: int) -> tuple[Move, bool]:
+    """Returns the move and the flipped flag from the packed number.
+
+    :param step: The packed move
+    """
+    return Move(step & 0xF, step >> 4 & 0xF, step >> 8 & 0x1F), bool(step & FLIPPED_BIT)
+
+
+class History:
+    """Moves that can be undone and redone.
+
+    Both lists are arrays of packed moves (2 bytes per move), undo and
+    redo just move one number from one array to the other.
+
+    Attributes:
+        self.done: Moves that were made (the last one is undone first)
+        self.undone: Moves that were undone (the last one is redone first)
+    """
+
+    def __init__(self):
+        self.done = array("H")
+        self.undone = array("H")
+
+    def record(self, move: Move, flipped: bool):
+        """Remembering a new move (the undone moves can't be redone after it).
+
+        :param move: The move that was made
+        :param flipped: True if a face down card got turned up by the move
+        """
+        self.done.append(pack_step(move, flipped))
+        if self.undone:
+            self.undone = array("H")
+
+    def last_move(self) -> Move | None:
+        """Returns the last move made (None if there's none)"""
+        if not self.done:
+            return None
+        return unpack_step(self.done[-1])[0]
+
+    def can_undo(self) -> bool:
+        return bool(self.done)
+
+    def can_redo(self) -> bool:
+        return bool(self.undone)
+
+    def undo(self) -> tuple[Move, bool] | None:
+        """Returns the move to take back (None if there's nothing to undo)"""
+        if not self.done:
+            return None
+        step = self.done.pop()
+        self.undone.append(step)
+        return unpack_step(step)
+
+    def redo(self) -> tuple[Move, bool] | None:
+        """Returns the move to make again (None if there's nothing to redo)"""
+        if not self.undone:
+            return None
+        step = self.undone.pop()
+        self.done.append(step)
+        return unpack_step(step)
+
+    def __len__(self):
+        return len(self.done)
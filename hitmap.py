@@ -0,0 +1,74 @@
+import logging
+
+from typing import NamedTuple
+
+
+logger = logging.getLogger(__name__)
+
+
+class Hit(NamedTuple):
+    """What's on one cell of the screen.
+
+    Attributes:
+        self.pile: The pile the cell belongs to
+        self.card: The card activated by a click there (None if there's no such card)
+        self.target: True if a click there puts the active card on the pile
+        self.covered: True if other cards lie on the card (only its top row is visible)
+    """
+
+    pile: object
+    card: object | None
+    target: bool
+    covered: bool = False
+
+
+class HitIndex:
+    """Index from a screen cell to the pile and card shown there.
+
+    Clicks are found with one dict lookup instead of checking every pile
+    and card. Piles that changed are only marked, their cells get rebuilt
+    on the next lookup (so moves made without clicking cost nothing here).
+
+    Attributes:
+        self.cells: (x, y) -> Hit
+        self.pile_cells: pile -> cells that belong to it
+        self.stale: Piles whose cells have to be rebuilt
+    """
+
+    def __init__(self, piles: list | None = None):
+        self.cells: dict[tuple[int, int], Hit] = {}
+        self.pile_cells: dict[object, list[tuple[int, int]]] = {}
+        self.stale: list = list(piles or [])
+
+    def invalidate(self, pile):
+        """Marking the pile's cells to be rebuilt.
+
+        :param pile: The pile that changed
+        """
+        if pile not in self.stale:
+            self.stale.append(pile)
+
+    def rebuild(self, pile):
+        """Replacing the cells of the pile with its current ones.
+
+        :param pile: The pile to rebuild
+        """
+        for cell in self.pile_cells.pop(pile, ()):
+            hit = self.cells.get(cell)
+            if hit is not None and hit.pile is pile:
+                del self.cells[cell]
+        new_cells = pile.hit_cells()
+        self.cells.update(new_cells)
+        self.pile_cells[pile] = list(new_cells)
+
+    def at(self, x: int, y: int) -> Hit | None:
+        """Returns what's on the cell (None if there's nothing).
+
+        :param x: The x coord of the cell
+        :param y: The y coord of the cell
+        """
+        if self.stale:
+            for pile in self.stale:
+                self.rebuild(pile)
+            self.stale = []
+        return self.cells.get((x, y))
@@ -0,0 +1,140 @@
+import logging
+
+from functools import lru_cache
+from typing import NamedTuple
+
+
+logger = logging.getLogger(__name__)
+
+
+##################################################################
+# Where everything is on the screen.
+#
+# The places of the piles, the texts and the restart button depend only
+# on the size of the terminal, so they're worked out once per size (and
+# kept in the cache) instead of being hard-coded in every class. Big
+# terminals get the full size cards, small ones (down to 80x24) the
+# compact ones with the texts on the left.
+##################################################################
+
+REGULAR_COLS = 122  # The full size desk needs this many columns
+REGULAR_ROWS = 30  # and this many rows (the rest gets the compact desk)
+
+COMPACT_CARD_WIDTH = 5
+COMPACT_CARD_HEIGHT = 4
+COMPACT_TEXT_WIDTH = 28  # The texts are on the left of the compact desk
+
+
+class Layout(NamedTuple):
+    """Geometry of the whole game screen (for one terminal size).
+
+    Attributes:
+        self.compact: True if it's the small desk (the texts are shorter too)
+        self.card_width: Width of a card (without the right border)
+        self.card_height: Height of a face up card (without the bottom border)
+        self.card_step: How many rows of a face up card show under the next one in the Tableau
+        self.hidden_step: The same for a face down card
+        self.stock_x: x coord of the Stock pile
+        self.waste_x: x coord of the turned cards of the Stock pile
+        self.top_y: y coord of the Stock and Foundation piles
+        self.foundation_x: x coord of every Foundation pile (by CardColorEnum value)
+        self.tableau_x: x coord of every Tableau pile (by the pile's index)
+        self.tableau_y: y coord of the Tableau piles
+        self.tableau_rows: How many rows a Tableau pile can take (to the bottom of the screen)
+        self.text_x: x coord of the texts (deal, time, hint...)
+        self.text_y: y coord of the first text
+        self.text_width: How long the texts can be
+        self.restart_x: x coord of the restart button
+        self.restart_y: y coord of the restart button
+    """
+
+    compact: bool
+    card_width: int
+    card_height: int
+    card_step: int
+    hidden_step: int
+    stock_x: int
+    waste_x: int
+    top_y: int
+    foundation_x: tuple[int, ...]
+    tableau_x: tuple[int, ...]
+    tableau_y: int
+    tableau_rows: int
+    text_x: int
+    text_y: int
+    text_width: int
+    restart_x: int
+    restart_y: int
+
+
+def regular_layout(rows: int = REGULAR_ROWS) -> Layout:
+    """Returns the layout of the full size desk (the one the game always had)
+
+    :param rows: Height of the terminal
+    """
+    return Layout(
+        compact=False,
+        card_width=8,
+        card_height=6,
+        card_step=2,
+        hidden_step=1,
+        stock_x=40,
+        waste_x=50,
+        top_y=1,
+        foundation_x=(82, 112, 92, 102),  # Hearts, spades, diamonds, clubs
+        tableau_x=tuple(28 + 12 * (7 - i) for i in range(7)),
+        tableau_y=9,
+        tableau_rows=rows - 9,
+        text_x=7,
+        text_y=10,
+        text_width=33,
+        restart_x=10,
+        restart_y=20,
+    )
+
+
+def compact_layout(rows: int = 24) -> Layout:
+    """Returns the layout of the small desk (fits 80x24).
+
+    The Tableau piles go from the right edge to the texts, the Stock pile
+    is above the last one and the Foundation piles above the first four.
+
+    :param rows: Height of the terminal
+    """
+    step = COMPACT_CARD_WIDTH + 2  # (the border and one empty column)
+    tableau_x = tuple(COMPACT_TEXT_WIDTH + 3 + step * (6 - i) for i in range(7))
+    tableau_y = COMPACT_CARD_HEIGHT + 3
+    return Layout(
+        compact=True,
+        card_width=COMPACT_CARD_WIDTH,
+        card_height=COMPACT_CARD_HEIGHT,
+        card_step=2,
+        hidden_step=1,
+        stock_x=tableau_x[6],
+        waste_x=tableau_x[5],
+        top_y=1,  # (0 would look like no coords to Card.draw())
+        foundation_x=(tableau_x[3], tableau_x[0], tableau_x[2], tableau_x[1]),
+        tableau_x=tableau_x,
+        tableau_y=tableau_y,
+        tableau_rows=rows - tableau_y,
+        text_x=1,
+        text_y=1,
+        text_width=COMPACT_TEXT_WIDTH,
+        restart_x=1,
+        restart_y=9,
+    )
+
+
+@lru_cache(maxsize=16)
+def get_layout(rows: int, cols: int) -> Layout:
+    """Returns the layout for the terminal size (worked out only once per size).
+
+    :param rows: Height of the terminal
+    :param cols: Width of the terminal
+    """
+    if cols >= REGULAR_COLS and rows >= REGULAR_ROWS:
+        layout = regular_layout(rows)
+    else:
+        layout = compact_layout(rows)
+    logger.debug(f"Layout for {cols}x{rows}: {'compact' if layout.compact else 'regular'}")
+    return layout
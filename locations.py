@@ -0,0 +1,108 @@
+import logging
+
+from typing import NamedTuple
+
+from engine import GameState, Move, FOUNDATION, WASTE, STOCK, DECK_SIZE, make_card
+
+
+logger = logging.getLogger(__name__)
+
+
+class CardLocation(NamedTuple):
+    """Where a card is"""
+
+    pile: int  # Index of the pile (as in engine.py)
+    position: int  # 0 is the bottom card of the pile
+    face_up: bool
+
+
+class LocationIndex:
+    """Index from a card (its code) to its pile, position and face up status.
+
+    Desk updates it after every move (and undo/redo), only the cards on the
+    top of the two piles the move touched are indexed again. So finding a
+    card, or the run on it, never goes through the piles.
+
+    Attributes:
+        self.state: The game state the cards are in (the desk's)
+        self.locations: Card code -> CardLocation
+    """
+
+    def __init__(self, state: GameState):
+        self.state = state
+        self.locations: list[CardLocation | None] = [None] * DECK_SIZE
+        self.rebuild()
+
+    def rebuild(self):
+        """Indexing every card again (after the state was replaced)."""
+        self.locations = [None] * DECK_SIZE
+        for pile in range(STOCK + 1):
+            self.index_top(pile, DECK_SIZE)
+        missing = self.locations.count(None)
+        if missing:
+            logger.error(f"Hm, I think {missing} cards went missing...")
+
+    def update(self, move: Move):
+        """Indexing the cards the move (or taking it back) changed.
+
+        That's the moved cards and the card under them (it could be turned),
+        which are on the top of one of the two piles either way.
+
+        :param move: The move that was made or taken back
+        """
+        self.index_top(move.dst, move.count + 1)
+        self.index_top(move.src, move.count + 1)
+
+    def index_top(self, pile: int, count: int):
+        """Indexing the top cards of the pile.
+
+        :param pile: Index of the pile
+        :param count: How many cards from the top
+        """
+        locations = self.locations
+        if FOUNDATION <= pile < WASTE:
+            suit = pile - FOUNDATION
+            height = self.state.foundations[suit]
+            for rank in range(max(1, height - count + 1), height + 1):
+                locations[make_card(suit, rank)] = CardLocation(pile, rank - 1, True)
+            return
+
+        if pile < FOUNDATION:
+            cards = self.state.tableau[pile]
+            hidden = self.state.hidden[pile]
+        elif pile == WASTE:
+            cards = self.state.waste
+            hidden = 0
+        else:
+            cards = self.state.stock
+            hidden = len(cards)
+        for position in range(max(0, len(cards) - count), len(cards)):
+            locations[cards[position]] = CardLocation(pile, position, position >= hidden)
+
+    def where(self, card: int) -> CardLocation:
+        """Returns where the card is
+
+        :param card: The card's code
+        """
+        return self.locations[card]
+
+    def pile_size(self, pile: int) -> int:
+        """Returns how many cards are in the pile
+
+        :param pile: Index of the pile
+        """
+        if pile < FOUNDATION:
+            return len(self.state.tableau[pile])
+        if pile == WASTE:
+            return len(self.state.waste)
+        if pile == STOCK:
+            return len(self.state.stock)
+        return self.state.foundations[pile - FOUNDATION]
+
+    def run_length(self, card: int) -> int:
+        """Returns how many cards the card and the ones on it are
+
+        :param card: The card's code
+        """
+        location = self.locations[card]
+        return self.pile_size(location.pile) - location.position
@@ -0,0 +1,127 @@
+import os
+import queue
+import atexit
+import logging
+import logging.handlers
+
+
+logger = logging.getLogger(__name__)
+
+
+##################################################################
+# Logging setup.
+#
+# The game only puts the log records in a queue, a background thread
+# (QueueListener) writes them to the file, so no disk I/O happens while
+# handling the input. The file is rotated when it gets too big.
+#
+# Levels can be changed with environment variables:
+#     SOLITAIRE_LOG_LEVEL=INFO                   level of everything
+#     SOLITAIRE_LOG_LEVELS=desk=WARNING,piles=INFO  level of some modules
+# Every module has its own logger (logging.getLogger(__name__)), so a
+# disabled level is checked once and the record isn't even made.
+##################################################################
+
+LOG_FILE = "solitare.log"
+LOG_FORMAT = "{asctime} - {levelname} - {name}: {message}"
+DATE_FORMAT = "%Y-%m-%d %H:%M"
+MAX_BYTES = 1024 * 1024  # Size of the file before it's rotated
+BACKUP_COUNT = 3  # How many rotated files are kept
+
+_listener: logging.handlers.QueueListener | None = None
+
+
+class _RecordQueueHandler(logging.handlers.QueueHandler):
+    """Puts the records in the queue as they are (the writer thread formats them).
+
+    The default QueueHandler formats the message before putting it in the queue
+    (it's made for sending records to other processes), which is work done on
+    the input path for nothing here.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def parse_levels(text: str) -> dict[str, int]:
+    """Returns the levels from text like "desk=WARNING,piles=INFO".
+
+    :param text: Module names and levels, separated with commas
+    """
+    levels = {}
+    for part in text.split(","):
+        name, _, level = part.strip().partition("=")
+        if not name or not level:
+            continue
+        number = logging.getLevelName(level.strip().upper())
+        if isinstance(number, int):
+            levels[name.strip()] = number
+    return levels
+
+
+def setup_logging(
+    path: str = LOG_FILE,
+    level: int | str | None = None,
+    module_levels: dict[str, int] | None = None,
+    max_bytes: int = MAX_BYTES,
+    backup_count: int = BACKUP_COUNT,
+) -> logging.handlers.QueueListener:
+    """Starting the background log writer and making every logger use it.
+
+    :param path: The log file
+    :param level: Level of everything (SOLITAIRE_LOG_LEVEL or DEBUG by default, DEBUG if unknown)
+    :param module_levels: Module name -> level (SOLITAIRE_LOG_LEVELS by default)
+    :param max_bytes: Size of the file before it's rotated
+    :param backup_count: How many rotated files are kept
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    if level is None:
+        level = os.environ.get("SOLITAIRE_LOG_LEVEL", "DEBUG")
+    unknown_level = None
+    if isinstance(level, str):
+        number = logging.getLevelName(level.strip().upper())
+        if not isinstance(number, int):  # (it's "Level <name>" then)
+            unknown_level, number = level, logging.DEBUG
+        level = number
+    if module_levels is None:
+        module_levels = parse_levels(os.environ.get("SOLITAIRE_LOG_LEVELS", ""))
+
+    file_handler = logging.handlers.RotatingFileHandler(
+        path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+    )
+    file_handler.setFormatter(logging.Formatter(LOG_FORMAT, DATE_FORMAT, style="{"))
+
+    records = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.addHandler(_RecordQueueHandler(records))
+    root.setLevel(level)
+    for name, module_level in module_levels.items():
+        logging.getLogger(name).setLevel(module_level)
+
+    _listener = logging.handlers.QueueListener(records, file_handler)
+    _listener.start()
+    atexit.register(stop_logging)
+    if unknown_level is not None:
+        logger.warning(f"Unknown log level {unknown_level!r}, logging everything (DEBUG)")
+    return _listener
+
+
+def stop_logging():
+    """Writing the records that are still in the queue and stopping the writer.
+
+    Records logged after that (by other exit handlers) go straight to the file.
+    """
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        if isinstance(handler, _RecordQueueHandler):
+            root.removeHandler(handler)
+    for handler in _listener.handlers:
+        root.addHandler(handler)
+    _listener = None
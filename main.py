@@ -1,49 +1,68 @@
+import profiling  # (first, it notes when the program started)
+
 import curses
 import sys
 import logging
+import argparse
 import time
 
+import palette
+from engine import MAX_DEAL
 from game import run
+from logs import setup_logging, stop_logging
+
+
+logger = logging.getLogger(__name__)
 
 
-##################################################################
-# logging setup
-logging.basicConfig(
-    filename="solitare.log",
-    encoding="utf-8",
-    filemode="a",
-    format="{asctime} - {levelname}: {message}",
-    style="{",
-    datefmt="%Y-%m-%d %H:%M",
-    level=logging.DEBUG,
-)
-##################################################################
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Birbuh's Console Solitaire")
+    parser.add_argument(
+        "-d",
+        "--deal",
+        type=int,
+        default=None,
+        help=f"number of the deal to play first (1 to {MAX_DEAL}, random by default)",
+    )
+    parser.add_argument(
+        "-a",
+        "--animate",
+        action="store_true",
+        help="let the cards fly when they move (and a won game finish itself)",
+    )
+    args = parser.parse_args(argv)
+    if args.deal is not None and not 1 <= args.deal <= MAX_DEAL:
+        parser.error(f"the deal number has to be from 1 to {MAX_DEAL}")
+    return args
 
-logger = logging.getLogger()
 
+def main(window: curses.window, deal_number: int | None = None, animate: bool = False) -> float:
+    """Function running the program.
 
-def main(window: curses.window):
-    """Function running the program."""
+    Returns the time the player quit (for the exit timing).
+    """
     # Setup
     curses.mousemask(curses.ALL_MOUSE_EVENTS)
+    # Every press is reported right away (curses would wait for the release to make a click)
+    curses.mouseinterval(0)
     curses.curs_set(0)  # Hide cursor
+    palette.init_colors()  # Once for the whole program
     window.clear()
     window.erase()
 
     # Start the game flow
-    run(window)
-
-    # Clean exit
-    window.clear()
-    window.addstr(10, 10, "Thanks for playing! The program will close soon.")
-    window.nodelay(False)  # Switch back to blocking mode for final input
-    window.refresh()
-    time.sleep(3)
+    run(window, deal_number, animate)
+    return time.perf_counter()
 
 
 if __name__ == "__main__":  # The program's called here
+    args = parse_args()
+    setup_logging()  # Records are written by a background thread (see logs.py)
     try:
-        curses.wrapper(main)
+        quit_time = curses.wrapper(main, args.deal, args.animate)
+        # The terminal is back to normal here, so the goodbye doesn't have to wait on the screen
+        print("Thanks for playing!")
+        profiling.report_timing("exit", time.perf_counter() - quit_time)
     except KeyboardInterrupt:
         sys.exit(0)  # exit if ctrl + c
     except Exception as e:
@@ -51,3 +70,5 @@ if __name__ == "__main__":  # The program's called here
         sys.exit(
             1
         )  # exit if an error occurs in the part in which catching exceptions aren't implemented.
+    finally:
+        stop_logging()
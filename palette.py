@@ -0,0 +1,73 @@
+import curses
+import logging
+
+from enum import IntEnum
+
+
+logger = logging.getLogger(__name__)
+
+
+##################################################################
+# Colors of the game.
+#
+# The color pairs are made once (init_colors() in main.py), after that
+# the attributes are just read from the cache. Without a terminal (the
+# game server) init_headless() is used instead, screen.py turns the
+# pairs into ANSI colors.
+##################################################################
+
+
+class PaletteEnum(IntEnum):
+    """Names of the color pairs (their numbers in curses)"""
+
+    RED = 1  # Red symbols
+    ACTIVE = 2  # Inside of the active card
+    ACTIVE_BLACK = 3  # Black symbols on the active card
+    ACTIVE_RED = 4  # Red symbols on the active card
+
+
+# Pair -> (foreground, background)
+PAIRS = {
+    PaletteEnum.RED: (curses.COLOR_RED, curses.COLOR_BLACK),
+    PaletteEnum.ACTIVE: (curses.COLOR_BLACK, curses.COLOR_MAGENTA),
+    PaletteEnum.ACTIVE_BLACK: (curses.COLOR_WHITE, curses.COLOR_MAGENTA),
+    PaletteEnum.ACTIVE_RED: (curses.COLOR_RED, curses.COLOR_MAGENTA),
+}
+
+_attrs: dict[PaletteEnum, int] = {}
+
+
+def init_colors():
+    """Starting the colors and making the color pairs (only the first time it's called)."""
+    if _attrs:
+        return
+    curses.start_color()
+    for pair, (foreground, background) in PAIRS.items():
+        curses.init_pair(pair, foreground, background)
+        _attrs[pair] = curses.color_pair(pair)
+
+
+def init_headless():
+    """Making the attributes without curses (the same numbers curses would give)."""
+    for pair in PAIRS:
+        _attrs[pair] = pair << 8
+
+
+def pair_number(attribute: int) -> int:
+    """Returns the number of the color pair in the attribute (0 if there's none)
+
+    :param attribute: The attribute (as from attr())
+    """
+    return (attribute & curses.A_COLOR) >> 8
+
+
+def attr(pair: PaletteEnum) -> int:
+    """Returns the attribute of the color pair (made the first time if they aren't yet)
+
+    :param pair: The color pair
+    """
+    attribute = _attrs.get(pair)
+    if attribute is None:
+        init_colors()
+        attribute = _attrs[pair]
+    return attribute
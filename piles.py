@@ -1,10 +1,16 @@
 import curses
 import logging
 
-from card import Card, CardColorEnum, CardPileEnum
+from itertools import accumulate
 
+from card import Card, CardPileEnum
+from engine import can_stack_on_foundation
+from hitmap import Hit
+from layout import Layout
+from sprites import SUIT_SYMBOLS, draw_rows, get_empty_pile
 
-logger = logging.getLogger()
+
+logger = logging.getLogger(__name__)
 
 
 class Pile:
@@ -15,19 +21,39 @@ class Pile:
         self.card_list: list of cards inside the pile
         self.x: x coord of the pile
         self.y: y coord of the pile
-        self.width: width of the pile (same as the card's, 8)
-        self.height: height of the pile (same as the **turned** card's, 6)
+        self.width: width of the pile (same as the card's, 8 or less on the compact desk)
+        self.height: height of the pile (same as the **turned** card's, 6 or less)
         self.window: The window in which everything is drawn.
+        self.drawn_rows: How many rows of the screen the pile took when it was drawn
+        self.drawn_width: How many columns of the screen the pile takes
+        self.pile_enum: What the cards put on the pile know it as
     """
 
     def __init__(self):
         self.card_list: list[Card] = []
+        self.pile_enum: CardPileEnum | None = None
         self.x = None
         self.y = None
         self.width = 8
         self.height = 6
         self.window: curses.window = None
         self.turned_card_list: list[Card] | None = None
+        self.drawn_rows = self.height + 1
+        self.drawn_width = self.width + 1
+
+    def place(self, x: int, y: int, layout: Layout):
+        """Moving the pile to x, y and giving it the layout's card size (see layout.py).
+
+        :param x: The new x coord
+        :param y: The new y coord
+        :param layout: The layout of the screen
+        """
+        self.x = x
+        self.y = y
+        self.width = layout.card_width
+        self.height = layout.card_height
+        self.drawn_rows = self.height + 1
+        self.drawn_width = self.width + 1
 
     def is_empty(self) -> bool:
         """Checking if the pile is empty."""
@@ -36,16 +62,6 @@ class Pile:
         else:
             return True
 
-    def is_last_card(self, card: Card):
-        """Checking if the card is the last card from the pile.
-
-        :param card: The card to check
-        """
-        try:
-            return card == self.card_list[-1]
-        except IndexError:
-            return False
-
     def is_clicked(self, x: int, y: int) -> bool:
         """Checking for a click in the pile.
 
@@ -57,21 +73,76 @@ class Pile:
             self.y <= y < (self.y + self.height)
         )
 
+    def box_cells(self, x: int, y: int) -> list[tuple[int, int]]:
+        """Returns the clickable cells of a card (or an empty pile) at x, y.
+
+        :param x: x coord of the card
+        :param y: y coord of the card
+        """
+        return [
+            (cell_x, cell_y)
+            for cell_y in range(y, y + self.height)
+            for cell_x in range(x, x + self.width)
+        ]
+
+    def hit_cells(self) -> dict[tuple[int, int], Hit]:
+        """Returns the cells on which a click lands on this pile (see hitmap.py)"""
+        hit = Hit(self, None, True)
+        return {cell: hit for cell in self.box_cells(self.x, self.y)}
+
+    def card_place(self, index: int) -> tuple[int, int]:
+        """Returns the x, y coords of the card with the index (the card lands there)
+
+        :param index: Index of the card in the pile
+        """
+        return self.x, self.y
+
+    def overlaps(self, x: int, y: int, width: int, height: int) -> bool:
+        """Checking if the part of the screen the pile was drawn on overlaps the box.
+
+        :param x: x coord of the box
+        :param y: y coord of the box
+        :param width: Width of the box
+        :param height: Height of the box
+        """
+        return (
+            x < self.x + self.drawn_width
+            and self.x < x + width
+            and y < self.y + self.drawn_rows
+            and self.y < y + height
+        )
+
+    @staticmethod
+    def landed(cards: list[Card]) -> int:
+        """Returns how many of the cards are drawn (the flying ones on the top aren't).
+
+        :param cards: The cards of the pile
+        """
+        count = len(cards)
+        while count and cards[count - 1].flying:
+            count -= 1
+        return count
+
+    def empty_rows(self, symbol: str = "") -> tuple[str, ...]:
+        """Returns the look of the empty pile (in the pile's size)
+
+        :param symbol: The symbol shown inside
+        """
+        return get_empty_pile(symbol, self.width, self.height)
+
     def draw_empty(self):
         """Drawing the empty pile (without cards)"""
         if not any(self.card_list):
-            for i in range(self.width):
-                self.window.addch(self.y, self.x + i, curses.ACS_HLINE)
-                self.window.addch(self.y + self.height, self.x + i, curses.ACS_HLINE)
-            for i in range(self.height):
-                self.window.addch(self.y + i, self.x, curses.ACS_VLINE)
-                self.window.addch(self.y + i, self.x + self.width, curses.ACS_VLINE)
-            self.window.addch(self.y, self.x, curses.ACS_ULCORNER)
-            self.window.addch(self.y, self.x + self.width, curses.ACS_URCORNER)
-            self.window.addch(self.y + self.height, self.x, curses.ACS_LLCORNER)
-            self.window.addch(
-                self.y + self.height, self.x + self.width, curses.ACS_LRCORNER
-            )
+            draw_rows(self.window, self.y, self.x, self.empty_rows())
+
+    def undraw(self):
+        """Clearing the part of the screen the pile was drawn on."""
+        blank = " " * self.drawn_width
+        for y in range(self.y, self.y + self.drawn_rows):
+            try:
+                self.window.addstr(y, self.x, blank)
+            except curses.error:
+                pass  # Off the screen
 
     def is_a_stock_pile(self) -> bool:
         """Checking if this pile is a StockPile."""
@@ -83,9 +154,6 @@ class Pile:
         except NotImplementedError:
             return True
 
-    def is_in_card_list(self, card):
-        return card in self.card_list
-
     def pile_or_card_clicked(self, x, y):
         """Check if last card in a pile is clicked (or, if it's not found, check the pile itself).
 
@@ -105,50 +173,27 @@ class Pile:
     def can_move_from(self):
         raise NotImplementedError()
 
-    # Moving the card methods
-    def move_to(self, count: int = -1):
-        """Method to **TAKE THE CARD(S) OFF**
-        Caution: many cards can be taken off.
+    # Moving the cards
+    def take_run(self, count: int = 1, turn_up: bool = True) -> list[Card]:
+        """Taking the last cards off the pile (all at once), the card under them gets turned up.
 
-        :param count: How many cards will get removed
+        :param count: How many cards are taken
+        :param turn_up: False if the card under them has to stay as it is (taking a move back)
         """
+        cards = self.card_list[-count:]
+        del self.card_list[-count:]
+        if turn_up and self.card_list:
+            self.card_list[-1].turn()
+        return cards
 
-        if self.can_move_to():
-            if self.turned_card_list:
-                next_card = self.turned_card_list[-1]
-                self.turned_card_list.remove(next_card)
-                try:
-                    self.turned_card_list[-1].turn()
-                except IndexError:
-                    pass
-            else:
-                if count == -1:
-                    try:
-                        next_card = self.card_list[-1]
-                        self.card_list.remove(next_card)
-                        self.card_list[-1].turn()
-                    except IndexError:
-                        pass
-                else:
-                    try:
-                        next_card = self.card_list[count]
-                        self.card_list.remove(next_card)
-                        self.card_list[-1 + count].turn()
-                    except Exception:
-                        logger.error(
-                            "Transfer of multiple cards went wrong.", exc_info=True
-                        )
-
-    def move_from_other_pile(self, card: Card | None):
-        """Method to **PUT THE CARD ON THIS PILE**
-        Caution: Only one card can be put at once.
-
-        :param addy: The space to add to the original pile y.
-        :param pile_enum: Card has to know, in which pile it is.
-        :param card: The card to move to this pile.
+    def put_run(self, cards: list[Card]):
+        """Putting the cards on the pile (in the same order).
+
+        :param cards: The cards to put
         """
-        if self.can_move_from():
-            self.card_list.append(card)
+        self.card_list.extend(cards)
+        for card in cards:
+            card.change_piles(self.pile_enum)
 
 
 class FoundationPile(Pile):
@@ -166,66 +211,27 @@ class FoundationPile(Pile):
 
     def __init__(self, window: curses.window, color):
         super().__init__()
-        self.x = 112
-        self.y = 1
         self.window = window
         self.color = color
-        if self.color == CardColorEnum.HEARTS:
-            self.x -= 30
-        elif self.color == CardColorEnum.DIAMONDS:
-            self.x -= 20
-        elif self.color == CardColorEnum.CLUBS:
-            self.x -= 10
-        # else:     # spades will have the default x.
-        # pass
+        self.pile_enum = CardPileEnum.FOUNDATIONS
 
     def draw(self):
         """Draws the Foundation piles."""
-        if self.is_empty():
-            for i in range(self.width):
-                self.window.addch(self.y, self.x + i, curses.ACS_HLINE)
-                self.window.addch(self.y + self.height, self.x + i, curses.ACS_HLINE)
-            for i in range(self.height):
-                self.window.addch(self.y + i, self.x, curses.ACS_VLINE)
-                self.window.addch(self.y + i, self.x + self.width, curses.ACS_VLINE)
-            self.window.addch(self.y, self.x, curses.ACS_ULCORNER)
-            self.window.addch(self.y, self.x + self.width, curses.ACS_URCORNER)
-            self.window.addch(self.y + self.height, self.x, curses.ACS_LLCORNER)
-            self.window.addch(
-                self.y + self.height, self.x + self.width, curses.ACS_LRCORNER
-            )
-            if self.color == CardColorEnum.HEARTS:
-                symbol = "♥"
-            elif self.color == CardColorEnum.DIAMONDS:
-                symbol = "♦"
-            elif self.color == CardColorEnum.CLUBS:
-                symbol = "♣"
-            else:  # SPADES
-                symbol = "♠"
-
-            self.window.addstr(
-                int(self.y + self.height - 1), int(self.x + self.width / 2 - 1), symbol
-            )
+        shown = self.landed(self.card_list)
+        if not shown:
+            symbol = SUIT_SYMBOLS[self.color.value]
+            draw_rows(self.window, self.y, self.x, self.empty_rows(symbol))
         else:
-            self.card_list[-1].draw(self.x, self.y, CardPileEnum.FOUNDATIONS, True)
+            self.card_list[shown - 1].draw(self.x, self.y, CardPileEnum.FOUNDATIONS, True)
 
     def can_move(self, card: Card) -> bool:
         """Moves (if it's possible) a card to the Foundation pile.
 
         :param card: The card to check if it can move into the pile the method is called on.
         """
-        if self.color == card.color:
-            num_val = card.num.value
-            if num_val == 1:
-                if self.is_empty():
-                    return True
-            else:
-                try:
-                    if num_val == self.card_list[-1].num.value + 1:
-                        return True
-                except IndexError:
-                    pass
-        return False
+        return can_stack_on_foundation(
+            card.code, self.color.value, len(self.card_list)
+        )
 
     # Method override
     def can_move_from(self) -> bool:
@@ -243,65 +249,105 @@ class TableauPile(Pile):
         self.width: width of the pile (same as the card's, 8)
         self.height: height of the pile (same as the **turned** card's, 6)
         self.window: The window in which everything is drawn.
+        self.step: How many rows of a face up card show under the next one
+        self.hidden_step: How many rows of a face down card show under the next one
+        self.max_rows: How many rows the pile can take (None if there's no limit)
     """
 
-    def __init__(self, card_list: list[Card], x: int, window: curses.window):
+    def __init__(self, card_list: list[Card], window: curses.window):
         super().__init__()
         self.card_list = card_list
         self.window = window
-        self.x = x
-        self.y = 9
+        self.step = 2
+        self.hidden_step = 1
+        self.max_rows: int | None = None
+        self.pile_enum = CardPileEnum.TABLEAU
+
+    def place(self, x: int, y: int, layout: Layout):
+        super().place(x, y, layout)
+        self.step = layout.card_step
+        self.hidden_step = layout.hidden_step
+        self.max_rows = layout.tableau_rows
+        self.update_drawn_rows()
 
     def init_draw(self):
-        for i, card in enumerate(self.card_list):
-            if i == len(self.card_list) - 1:  # Last card should be face up
-                card.draw(self.x, self.y + i * 2, CardPileEnum.TABLEAU, True)
-            else:
-                card.draw(self.x, self.y + i * 2, CardPileEnum.TABLEAU, False)
+        """Drawing the pile for the first time (Desk already turned the last card up)"""
+        self.draw()
+
+    def card_offsets(self) -> list[int]:
+        """Returns how many rows under the pile's y every card is.
+
+        If the pile doesn't fit in self.max_rows, the face down cards (but the
+        last one) stop showing, then the lowest face up cards show only their
+        top border (so the cards on the top stay readable).
+        """
+        cards = self.card_list
+        if not cards:
+            return []
+        steps = [self.step if card.turned else self.hidden_step for card in cards[:-1]]
+        excess = 0 if self.max_rows is None else sum(steps) + self.height + 1 - self.max_rows
+        if excess > 0:
+            hidden = sum(not card.turned for card in cards[:-1])  # (they're the lowest)
+            squeezes = (
+                (range(hidden - 1), 0),
+                (range(hidden, len(steps)), 1),
+                (range(len(steps)), 0),  # Only on a very short screen
+            )
+            for indexes, rows in squeezes:
+                for i in indexes:
+                    if excess <= 0:
+                        break
+                    cut = min(steps[i] - rows, excess)
+                    if cut > 0:
+                        steps[i] -= cut
+                        excess -= cut
+        return list(accumulate(steps, initial=0))
+
+    def update_drawn_rows(self, offsets: list[int] | None = None):
+        """Remembering how many rows the pile takes (the last card is face up)
+
+        :param offsets: The cards' offsets (worked out again if they're None)
+        """
+        if offsets is None:
+            offsets = self.card_offsets()
+        self.drawn_rows = offsets[-1] + self.height + 1 if offsets else 0
 
     def draw(self):
-        for i, card in enumerate(self.card_list):
+        offsets = self.card_offsets()
+        self.update_drawn_rows(offsets)
+        # The cards cover each other from the bottom to the top
+        cards = self.card_list
+        for i in range(self.landed(cards)):
+            card = cards[i]
+            shown = offsets[i + 1] if i + 1 < len(offsets) else offsets[i] + self.height
+            card.shown_rows = shown - offsets[i]
             card.draw(
-                self.x, self.y + i * 2, CardPileEnum.TABLEAU, card.get_turned_status()
+                self.x, self.y + offsets[i], CardPileEnum.TABLEAU, card.get_turned_status()
             )
-        for card in self.card_list:
-            if card.turned:
-                card.redraw()
 
-    def return_next_cards(self, card: Card) -> list[Card]:
-        if card in self.card_list:
-            card_index = self.card_list.index(card)
-            return self.card_list[card_index:]
+    def card_place(self, index: int) -> tuple[int, int]:
+        return self.x, self.y + self.card_offsets()[index]
 
-    def can_move_card(self, card: Card | None, cards: list[Card] | None = None) -> bool:
-        try:
-            last_card = self.card_list[-1]
-            if card.num.value == last_card.num.value - 1 and (
-                card.color_check() != last_card.color_check()
-            ):
-                return True
-        except IndexError:
-            if card.num.value == 13:  # King
-                return True
-        return False
+    def hit_cells(self) -> dict[tuple[int, int], Hit]:
+        """Returns the cells on which a click lands on this pile (see hitmap.py)
 
-    def iterate_and_activate(self, mouse_x, mouse_y) -> Card:
-        for card in self.card_list:
-            if card.is_clicked(mouse_x, mouse_y) and card.turned:
-                card.activate()
-                return card
+        A click activates the lowest face up card under it, and puts the active
+        card on this pile if it's on the last card (or on the empty pile).
+        """
+        cells = {}
+        offsets = self.card_offsets()
+        last = len(self.card_list) - 1
+        for i, card in enumerate(self.card_list):
+            if card.turned:
+                hit = Hit(self, card, False, i != last)
+                for cell in self.box_cells(self.x, self.y + offsets[i]):
+                    cells.setdefault(cell, hit)
 
-    def last_card_relative_y(self) -> int:
-        return self.card_list[-1].y - 9
-
-    def reactivate_last_card(self):
-        """Used for debug"""
-        try:
-            card = self.card_list[-1]
-            card.activate()
-            card.deactivate()
-        except IndexError:
-            pass
+        target_y = self.y + offsets[-1] if offsets else self.y
+        for cell in self.box_cells(self.x, target_y):
+            hit = cells.get(cell)
+            cells[cell] = hit._replace(target=True) if hit else Hit(self, None, True)
+        return cells
 
     # Method override
     def can_move_to(self) -> bool:
@@ -316,6 +362,7 @@ class StockPile(Pile):
 
     Attributes:
         self.turned_card_list: basically the waste pile card_list
+        self.waste_x: x coord of the turned cards
         self.card_list: list of cards inside the pile
         self.x: x coord of the pile
         self.y: y coord of the pile
@@ -328,25 +375,20 @@ class StockPile(Pile):
         super().__init__()
         self.card_list = card_list
         self.window = window
-        self.x = 40
-        self.y = 1
+        self.waste_x = None
         self.turned_card_list: list[Card] = []
+        self.pile_enum = CardPileEnum.STOCK
+
+    def place(self, x: int, y: int, layout: Layout):
+        super().place(x, y, layout)
+        self.waste_x = layout.waste_x
+        # Both the stock and the turned cards
+        self.drawn_width = self.waste_x - self.x + self.width + 1
 
     def init_draw(self):
         for card in self.card_list:
             card.draw(self.x, self.y, CardPileEnum.STOCK, False)
-        for i in range(self.width):
-            self.window.addch(self.y, self.x + 10 + i, curses.ACS_HLINE)
-            self.window.addch(self.y + self.height, self.x + 10 + i, curses.ACS_HLINE)
-        for i in range(self.height):
-            self.window.addch(self.y + i, self.x + 10, curses.ACS_VLINE)
-            self.window.addch(self.y + i, self.x + 10 + self.width, curses.ACS_VLINE)
-        self.window.addch(self.y, self.x + 10, curses.ACS_ULCORNER)
-        self.window.addch(self.y, self.x + 10 + self.width, curses.ACS_URCORNER)
-        self.window.addch(self.y + self.height, self.x + 10, curses.ACS_LLCORNER)
-        self.window.addch(
-            self.y + self.height, self.x + 10 + self.width, curses.ACS_LRCORNER
-        )
+        draw_rows(self.window, self.y, self.waste_x, self.empty_rows())
 
     def draw(self):
         """Drawing the stockpile."""
@@ -355,28 +397,14 @@ class StockPile(Pile):
         else:
             self.draw_empty()
 
-        if self.turned_card_list:
-            self.turned_card_list[-1].draw(
-                self.x + 10, self.y, CardPileEnum.STOCK, True
+        shown = self.landed(self.turned_card_list)
+        if shown:
+            self.turned_card_list[shown - 1].draw(
+                self.waste_x, self.y, CardPileEnum.STOCK, True
             )
         else:
             # Draw empty turned pile
-            for i in range(self.width):
-                self.window.addch(self.y, self.x + 10 + i, curses.ACS_HLINE)
-                self.window.addch(
-                    self.y + self.height, self.x + 10 + i, curses.ACS_HLINE
-                )
-            for i in range(self.height):
-                self.window.addch(self.y + i, self.x + 10, curses.ACS_VLINE)
-                self.window.addch(
-                    self.y + i, self.x + 10 + self.width, curses.ACS_VLINE
-                )
-            self.window.addch(self.y, self.x + 10, curses.ACS_ULCORNER)
-            self.window.addch(self.y, self.x + 10 + self.width, curses.ACS_URCORNER)
-            self.window.addch(self.y + self.height, self.x + 10, curses.ACS_LLCORNER)
-            self.window.addch(
-                self.y + self.height, self.x + 10 + self.width, curses.ACS_LRCORNER
-            )
+            draw_rows(self.window, self.y, self.waste_x, self.empty_rows())
 
     def check_card(self) -> bool:
         """
@@ -396,8 +424,10 @@ class StockPile(Pile):
                 self.turned_card_list = []
                 for card in cards_to_move:
                     card.turn()  # Turn the card back down
-                    logger.debug("stock_cart modified in chceck_card (append)")
                     self.card_list.append(card)
+                logger.debug(
+                    "stock_cart modified in chceck_card (append %d)", len(cards_to_move)
+                )
                 return True
         return False
 
@@ -410,17 +440,50 @@ class StockPile(Pile):
             return True
         return False
 
+    def undo_reset(self):
+        """Putting all of the stock cards back on the turned pile (taking back a reset)."""
+        cards_to_move = list(reversed(self.card_list))
+        self.card_list = []
+        for card in cards_to_move:
+            card.turned = True
+            self.turned_card_list.append(card)
+
+    def take_run(self, count: int = 1, turn_up: bool = True) -> list[Card]:
+        """Taking the last turned cards (only the last one can be played from here)
+
+        :param count: How many cards are taken
+        :param turn_up: Not used (the turned cards are face up already)
+        """
+        cards = self.turned_card_list[-count:]
+        del self.turned_card_list[-count:]
+        return cards
+
+    def put_run(self, cards: list[Card]):
+        """Putting the cards back on the turned cards (taking a move back).
+
+        :param cards: The cards to put
+        """
+        self.turned_card_list.extend(cards)
+        for card in cards:
+            card.change_piles(self.pile_enum)
+
+    def card_place(self, index: int) -> tuple[int, int]:
+        return self.waste_x, self.y  # (only the turned cards are moved)
+
     def is_turned_list_empty(self) -> bool:
         return not self.turned_card_list
 
-    def try_activate(self, mouse_x, mouse_y) -> Card:
-        """Returns the card if it's clicked and can be activated"""
+    def hit_cells(self) -> dict[tuple[int, int], Hit]:
+        """Returns the cells on which a click lands on this pile (see hitmap.py)
+
+        Only the last turned card can be activated, cards can't be put here.
+        """
+        cells = {cell: Hit(self, None, False) for cell in self.box_cells(self.x, self.y)}
         if self.turned_card_list:
-            card = self.turned_card_list[-1]
-            if card.is_clicked(mouse_x, mouse_y):
-                card.activate()
-                return card
-        return None
+            hit = Hit(self, self.turned_card_list[-1], False)
+            for cell in self.box_cells(self.waste_x, self.y):
+                cells[cell] = hit
+        return cells
 
     def can_move_to(self) -> bool:
         return True
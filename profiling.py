@@ -0,0 +1,202 @@
+import os
+import sys
+import atexit
+import logging
+import functools
+
+from bisect import bisect_left
+from contextlib import nullcontext
+from time import perf_counter
+
+
+logger = logging.getLogger(__name__)
+
+
+##################################################################
+# Profiling hooks.
+#
+# Turned on with the SOLITAIRE_PROFILE environment variable (its value is
+# the file the report is written to when the program exits, "1" means
+# stderr). When it's off, timed() gives back the function as it is and
+# phase() a do-nothing context, so the hooks cost (almost) nothing.
+##################################################################
+
+PROFILE = os.environ.get("SOLITAIRE_PROFILE", "")
+ENABLED = PROFILE not in ("", "0")
+
+# Upper bounds of the histogram buckets in microseconds (the last one is for everything slower)
+BUCKETS_US = (
+    1, 2, 5,
+    10, 20, 50,
+    100, 200, 500,
+    1_000, 2_000, 5_000,
+    10_000, 20_000, 50_000,
+    100_000, 200_000, 500_000,
+    1_000_000,
+)  # fmt: skip
+
+
+class Histogram:
+    """Timings of one phase, counted in fixed buckets.
+
+    Attributes:
+        self.counts: How many timings fell in every bucket (one more for the slower ones)
+        self.count: How many timings there are
+        self.total: Sum of the timings in seconds
+        self.max: The longest timing in seconds
+    """
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_US) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float):
+        self.counts[bisect_left(BUCKETS_US, seconds * 1e6)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, fraction: float) -> float:
+        """Returns the upper bound (in microseconds) of the bucket the percentile is in.
+
+        :param fraction: 0.5 for p50, 0.99 for p99
+        """
+        if not self.count:
+            return 0.0
+        needed = fraction * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= needed and count:
+                if i < len(BUCKETS_US):
+                    return min(BUCKETS_US[i], self.max * 1e6)
+                break
+        return self.max * 1e6
+
+
+histograms: dict[str, Histogram] = {}
+
+# Start of the program (main.py imports this module first)
+STARTED = perf_counter()
+
+# Startup and exit timings (always logged) -> target in seconds, going over it is a warning
+TIMING_TARGETS = {
+    "first_frame": 0.25,  # Start of the program to the first screen
+    "new_deal": 0.05,  # Start of game() to the dealt cards on the screen
+    "exit": 0.1,  # Quit click to the end of curses
+}
+
+
+def record(name: str, seconds: float):
+    """Adding one timing to the phase's histogram.
+
+    :param name: Name of the phase
+    :param seconds: How long it took
+    """
+    histogram = histograms.get(name)
+    if histogram is None:
+        histogram = histograms[name] = Histogram()
+    histogram.add(seconds)
+
+
+class _Phase:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.name, perf_counter() - self.start)
+        return False
+
+
+_NOTHING = nullcontext()
+
+
+def phase(name: str):
+    """Returns a context that times what's done inside it (when profiling is on).
+
+    :param name: Name of the phase
+    """
+    return _Phase(name) if ENABLED else _NOTHING
+
+
+def timed(name: str):
+    """Decorator timing every call of the function (when profiling is on).
+
+    :param name: Name of the phase
+    """
+
+    def decorator(function):
+        if not ENABLED:
+            return function
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record(name, perf_counter() - start)
+
+        return wrapper
+
+    return decorator
+
+
+def report_timing(name: str, seconds: float):
+    """Logging one of the startup / exit timings (a warning if it's over its target).
+
+    :param name: Name of the timing (see TIMING_TARGETS)
+    :param seconds: How long it took
+    """
+    target = TIMING_TARGETS.get(name)
+    if target is not None and seconds > target:
+        logger.warning(
+            "Timing - %s: %.1f ms (target %.0f ms)", name, seconds * 1000, target * 1000
+        )
+    else:
+        logger.info("Timing - %s: %.1f ms", name, seconds * 1000)
+    if ENABLED:
+        record(name, seconds)
+
+
+def report() -> str:
+    """Returns the table of every phase (times in microseconds, p50/p99 are bucket bounds)"""
+    lines = [f"{'phase':<24}{'count':>8}{'mean':>10}{'p50':>10}{'p99':>10}{'max':>10}"]
+    for name, histogram in histograms.items():
+        mean = histogram.total / histogram.count * 1e6
+        lines.append(
+            f"{name:<24}{histogram.count:>8}{mean:>10.0f}"
+            f"{histogram.percentile(0.5):>10.0f}{histogram.percentile(0.99):>10.0f}"
+            f"{histogram.max * 1e6:>10.0f}"
+        )
+    lines.append("")
+    lines.append("buckets (us): " + " ".join(str(bound) for bound in BUCKETS_US) + " more")
+    for name, histogram in histograms.items():
+        lines.append(f"{name:<24}" + " ".join(str(count) for count in histogram.counts))
+    return "\n".join(lines)
+
+
+def dump():
+    """Writing the report to the file from SOLITAIRE_PROFILE (stderr for "1")"""
+    if not histograms:
+        return
+    text = report()
+    if PROFILE == "1":
+        print(text, file=sys.stderr)
+    else:
+        with open(PROFILE, "w", encoding="utf-8") as file:
+            file.write(text + "\n")
+    logger.info(f"Profile:\n{text}")
+
+
+if ENABLED:
+    atexit.register(dump)
@@ -0,0 +1,188 @@
+import os
+import sys
+import time
+import struct
+import logging
+import argparse
+
+from engine import GameState, Move, MOVE_PAIRS, FOUNDATION, WASTE, STOCK, shuffled_deck
+from history import History
+
+
+logger = logging.getLogger(__name__)
+
+
+##################################################################
+# Replay files.
+#
+# A replay is the seed of the deal and then one byte per move:
+#     0-57  index of the (src, dst) pair in engine.MOVE_PAIRS, the rest
+#           of the move (the Foundation pile, how many cards) is found
+#           from the cards, (STOCK, WASTE) is turning or resetting the stock
+#     58    UNDRAW, putting the last turned card back on the stock pile
+#     59    UNDO
+#     60    REDO
+# (UNDRAW is len(MOVE_PAIRS), UNDO and REDO come right after it)
+# The bytes are written as the moves are made, so a replay of a game
+# that got killed is still good up to the last move.
+##################################################################
+
+MAGIC = b"BCSR"
+VERSION = 1
+HEADER = struct.Struct("<4sBI")  # magic, version, seed
+
+UNDRAW = len(MOVE_PAIRS)
+UNDO = UNDRAW + 1
+REDO = UNDRAW + 2
+
+_PAIR_CODES = {pair: code for code, pair in enumerate(MOVE_PAIRS)}
+
+REPLAY_DIR = os.environ.get("SOLITAIRE_REPLAY_DIR", "replays")
+
+
+def encode_move(move: Move) -> int:
+    """Returns the byte of the move (see above).
+
+    :param move: The move (it has to be legal)
+    """
+    src, dst, count = move
+    if dst == STOCK:
+        if count == 1:
+            return UNDRAW  # (resetting one card is the same)
+        return _PAIR_CODES[(STOCK, WASTE)]
+    if FOUNDATION <= dst < WASTE:
+        dst = FOUNDATION
+    return _PAIR_CODES[(src, dst)]
+
+
+def decode_move(state: GameState, code: int) -> Move | None:
+    """Returns the move of the byte in the game state (None if it can't be made there).
+
+    :param state: The game state the move is made in
+    :param code: The byte of the move (not UNDO or REDO)
+    """
+    if code == UNDRAW:
+        move = Move(WASTE, STOCK)
+        return move if state.is_legal(move) else None
+    return state.pair_move(*MOVE_PAIRS[code])
+
+
+class ReplayWriter:
+    """Writes the moves of one game into a replay file (as they are made).
+
+    Attributes:
+        self.file: The replay file (not buffered, every move goes in right away)
+        self.moves: How many bytes were written after the header
+    """
+
+    def __init__(self, path: str, seed: int):
+        self.file = open(path, "wb", buffering=0)
+        self.file.write(HEADER.pack(MAGIC, VERSION, seed))
+        self.moves = 0
+
+    @classmethod
+    def for_seed(cls, seed: int, directory: str | None = None):
+        """Returns a writer of a new replay file in the directory.
+
+        :param seed: The seed of the deal
+        :param directory: Where the replays are kept (REPLAY_DIR by default)
+        """
+        directory = directory or REPLAY_DIR
+        os.makedirs(directory, exist_ok=True)
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{seed}.bcsr"
+        return cls(os.path.join(directory, name), seed)
+
+    def write(self, code: int):
+        self.file.write(bytes((code,)))
+        self.moves += 1
+
+    def move(self, move: Move):
+        self.write(encode_move(move))
+
+    def undo(self):
+        self.write(UNDO)
+
+    def redo(self):
+        self.write(REDO)
+
+    def close(self):
+        self.file.close()
+
+
+def read_replay(data: bytes) -> tuple[int, bytes]:
+    """Returns the seed and the moves of the replay.
+
+    :param data: The whole replay file
+    """
+    if len(data) < HEADER.size:
+        raise ValueError("Replay is too short")
+    magic, version, seed = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Not a replay file")
+    if version != VERSION:
+        raise ValueError(f"Unknown replay version {version}")
+    return seed, data[HEADER.size :]
+
+
+def play(data: bytes) -> GameState:
+    """Making all of the moves of the replay (without drawing anything).
+
+    Returns the game state after the last move, raises ValueError if a move
+    can't be made.
+
+    :param data: The whole replay file
+    """
+    seed, moves = read_replay(data)
+    state = GameState.deal(shuffled_deck(seed))
+    history = History()
+    apply = state.apply
+    record = history.record
+
+    for i, code in enumerate(moves):
+        if code == UNDO or code == REDO:
+            step = history.undo() if code == UNDO else history.redo()
+            if step is None:
+                raise ValueError(f"Move {i}: nothing to {'undo' if code == UNDO else 'redo'}")
+            if code == UNDO:
+                state.unapply(*step)
+            else:
+                apply(step[0])
+            continue
+        if code > UNDRAW:
+            raise ValueError(f"Move {i}: unknown move byte {code}")
+        move = decode_move(state, code)
+        if move is None:
+            raise ValueError(f"Move {i}: {MOVE_PAIRS[code] if code < UNDRAW else 'undraw'} can't be made")
+        record(move, apply(move))
+    return state
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Check (replay) recorded games.")
+    parser.add_argument("files", nargs="+", help="replay files")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    moves = bad = won = 0
+    for path in args.files:
+        with open(path, "rb") as file:
+            data = file.read()
+        try:
+            state = play(data)
+        except ValueError as e:
+            bad += 1
+            print(f"{path}: {e}")
+            continue
+        moves += len(data) - HEADER.size
+        won += state.is_won()
+    elapsed = time.perf_counter() - start
+    print(
+        f"{len(args.files)} replays ({bad} bad, {won} won), {moves} moves "
+        f"in {elapsed:.2f} s",
+        file=sys.stderr,
+    )
+    return 1 if bad else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+import curses
+import logging
+
+from palette import PAIRS, pair_number
+
+
+logger = logging.getLogger(__name__)
+
+
+##################################################################
+# Headless screen (used by the game server, see server.py).
+#
+# The desk draws in a Screen just like in a curses window, and
+# render() turns what changed since the last call into ANSI escape
+# codes, which any terminal on the other side of a socket can show.
+##################################################################
+
+# Sent when a session starts: hide the cursor, clear, report mouse clicks (SGR mode)
+START = "\x1b[?25l\x1b[0m\x1b[2J\x1b[?1000h\x1b[?1006h"
+# Sent when it ends: everything back to normal
+STOP = "\x1b[?1000l\x1b[?1006l\x1b[0m\x1b[2J\x1b[H\x1b[?25h"
+
+RESET = "\x1b[0m"
+# Color pair number -> the escape code of its colors
+COLORS = [RESET] * 256
+for _pair, (_foreground, _background) in PAIRS.items():
+    COLORS[_pair] = f"\x1b[0;{30 + _foreground};{40 + _background}m"
+
+
+class Screen:
+    """In-memory window the game can draw in instead of a curses window.
+
+    Only the drawing methods of curses.window the desk, the piles and the
+    cards use are here. Text that doesn't fit in the row is cut off (curses
+    would wrap it), writing off the screen raises curses.error as in curses.
+
+    Attributes:
+        self.rows: Height of the screen
+        self.cols: Width of the screen
+        self.chars: The text of every row
+        self.pairs: The color pair of every cell (a bytearray for every row)
+        self.sent_chars: The rows the terminal shows (as of the last render())
+        self.sent_pairs: The colors the terminal shows (as of the last render())
+    """
+
+    def __init__(self, rows: int = 50, cols: int = 140):
+        self.rows = rows
+        self.cols = cols
+        self.chars: list[str] = []
+        self.pairs: list[bytearray] = []
+        self.sent_chars: list[str] = []
+        self.sent_pairs: list[bytearray] = []
+        self.erase()
+        self.forget_sent()
+
+    def getmaxyx(self) -> tuple[int, int]:
+        return self.rows, self.cols
+
+    def _check(self, y: int, x: int):
+        if not (0 <= y < self.rows and 0 <= x < self.cols):
+            raise curses.error("screen: out of the screen")
+
+    def addnstr(self, y: int, x: int, text: str, n: int, attr: int = 0):
+        """Writing at most n characters of the text (with the attribute)"""
+        self._check(y, x)
+        text = text[: min(n, self.cols - x)]
+        end = x + len(text)
+        row = self.chars[y]
+        self.chars[y] = row[:x] + text + row[end:]
+        self.pairs[y][x:end] = bytes([pair_number(attr)]) * len(text)
+
+    def addstr(self, y: int, x: int, text: str, attr: int = 0):
+        self.addnstr(y, x, text, len(text), attr)
+
+    def addch(self, y: int, x: int, ch: str | int, attr: int = 0):
+        if isinstance(ch, int):
+            ch = chr(ch)
+        self.addnstr(y, x, ch, 1, attr)
+
+    def chgat(self, y: int, x: int, num: int, attr: int = 0):
+        """Changing the attribute of num characters (-1 for the rest of the row)"""
+        self._check(y, x)
+        end = self.cols if num < 0 else min(x + num, self.cols)
+        self.pairs[y][x:end] = bytes([pair_number(attr)]) * (end - x)
+
+    def erase(self):
+        """Clearing the screen (the terminal gets it with the next render())."""
+        self.chars = [" " * self.cols for _ in range(self.rows)]
+        self.pairs = [bytearray(self.cols) for _ in range(self.rows)]
+
+    def clear(self):
+        self.erase()
+
+    def forget_sent(self):
+        """The next render() sends the whole screen (as if the terminal was empty)."""
+        self.sent_chars = [""] * self.rows
+        self.sent_pairs = [bytearray() for _ in range(self.rows)]
+
+    def render(self) -> str:
+        """Returns the escape codes that change the terminal to show the screen.
+
+        Only the changed part of every row is sent (an empty string if nothing changed).
+        """
+        out = []
+        for y in range(self.rows):
+            chars = self.chars[y]
+            pairs = self.pairs[y]
+            sent_chars = self.sent_chars[y]
+            sent_pairs = self.sent_pairs[y]
+            if chars == sent_chars and pairs == sent_pairs:
+                continue
+            if len(sent_chars) != self.cols:
+                start, end = 0, self.cols  # Never sent
+            else:
+                changed = [
+                    x
+                    for x in range(self.cols)
+                    if chars[x] != sent_chars[x] or pairs[x] != sent_pairs[x]
+                ]
+                start, end = changed[0], changed[-1] + 1
+            out.append(f"\x1b[{y + 1};{start + 1}H")
+            out.append(self._colored(chars, pairs, start, end))
+            self.sent_chars[y] = chars
+            self.sent_pairs[y] = pairs[:]
+        if out:
+            out.append(RESET)
+        return "".join(out)
+
+    @staticmethod
+    def _colored(chars: str, pairs: bytearray, start: int, end: int) -> str:
+        """Returns the part of the row with the color codes (one code for every run of a color)"""
+        out = []
+        pair = None
+        for x in range(start, end):
+            if pairs[x] != pair:
+                pair = pairs[x]
+                out.append(COLORS[pair])
+            out.append(chars[x])
+        return "".join(out)
+
@@ -0,0 +1,338 @@
+import sys
+import curses
+import asyncio
+import functools
+import logging
+import argparse
+
+import palette
+from desk import Desk
+from game import DEAL_ROW, TITLE_ROW, QUIT_ROW, KEYS_ROW, HINT_ROW, put_text
+from logs import setup_logging, stop_logging
+from screen import Screen, START, STOP
+
+
+logger = logging.getLogger(__name__)
+
+
+##################################################################
+# Game server: many games in one process.
+#
+#     python server.py --port 7777            then: telnet localhost 7777
+#     python server.py --unix /tmp/bcs.sock   then: stty raw -echo; nc -U /tmp/bcs.sock
+#
+# Every connection gets its own Desk drawing in a Screen (screen.py),
+# after every key or click only the changed part of the screen is sent
+# (as ANSI escape codes). Everything runs in one asyncio loop, so a
+# session waiting for input is just its Desk and a suspended coroutine,
+# there's no thread, curses or interpreter per player.
+##################################################################
+
+HOST = "127.0.0.1"
+PORT = 7777
+SCREEN_ROWS = 50
+SCREEN_COLS = 122  # The last Tableau pile ends here
+MAX_SESSIONS = 1000
+IDLE_TIMEOUT = 30 * 60  # Seconds without input before the session is closed
+
+# Telnet commands (RFC 854) and the options the server asks for
+IAC = 255
+WILL, WONT, DO, DONT = 251, 252, 253, 254
+SB, SE = 250, 240
+ECHO, SUPPRESS_GO_AHEAD = 1, 3
+# The client sends the keys at once and doesn't echo them (character mode)
+TELNET_SETUP = bytes([IAC, WILL, ECHO, IAC, WILL, SUPPRESS_GO_AHEAD])
+
+QUIT_KEYS = (ord("q"), 3, 4)  # q, ctrl + c, ctrl + d
+
+
+class InputParser:
+    """Turns the bytes sent by the client into keys and mouse clicks.
+
+    Telnet commands are thrown away, mouse reports (SGR mode, "ESC [ < b ; x ; y M")
+    become clicks, other escape sequences (arrows etc.) are ignored. The data can
+    come in any pieces, an unfinished sequence waits for the rest.
+
+    Attributes:
+        self.pending: The start of a sequence that isn't complete yet
+    """
+
+    MAX_SEQUENCE = 32  # Longer escape sequences are garbage
+
+    def __init__(self):
+        self.pending = b""
+
+    def feed(self, data: bytes) -> list[tuple]:
+        """Returns the events in the data, ("key", code) or ("click", x, y, bstate).
+
+        :param data: The bytes received
+        """
+        data = self.pending + data
+        self.pending = b""
+        events = []
+        i = 0
+        while i < len(data):
+            byte = data[i]
+            if byte == IAC:
+                end = self._telnet_end(data, i)
+            elif byte == 0x1B:
+                end = self._escape_end(data, i)
+                if end is not None:
+                    event = self._mouse(data[i:end])
+                    if event:
+                        events.append(event)
+            else:
+                events.append(("key", byte))
+                end = i + 1
+            if end is None:  # Unfinished, the rest comes with the next data
+                if len(data) - i <= self.MAX_SEQUENCE:
+                    self.pending = data[i:]
+                break
+            i = end
+        return events
+
+    @staticmethod
+    def _telnet_end(data: bytes, i: int) -> int | None:
+        """Returns where the telnet command at i ends (None if it's not complete)"""
+        if i + 1 >= len(data):
+            return None
+        command = data[i + 1]
+        if command == SB:  # Subnegotiation, up to IAC SE
+            end = data.find(bytes([IAC, SE]), i + 2)
+            return None if end == -1 else end + 2
+        if command in (WILL, WONT, DO, DONT):
+            return i + 3 if i + 2 < len(data) else None
+        return i + 2
+
+    @staticmethod
+    def _escape_end(data: bytes, i: int) -> int | None:
+        """Returns where the escape sequence at i ends (None if it's not complete)"""
+        if i + 1 >= len(data):
+            return None
+        if data[i + 1] != ord("["):
+            return i + 2  # Alt + key
+        for end in range(i + 2, len(data)):
+            if 0x40 <= data[end] <= 0x7E:  # The final byte of a CSI sequence
+                return end + 1
+        return None
+
+    @staticmethod
+    def _mouse(sequence: bytes) -> tuple | None:
+        """Returns the click of a mouse report (None if it's something else)"""
+        if not sequence.startswith(b"\x1b[<") or sequence[-1:] != b"M":
+            return None  # Not a mouse report, or a button release
+        try:
+            button, x, y = (int(part) for part in sequence[3:-1].split(b";"))
+        except ValueError:
+            return None
+        if button == 0:
+            bstate = curses.BUTTON1_PRESSED
+        elif button == 2:
+            bstate = curses.BUTTON3_PRESSED
+        else:
+            return None  # Middle button, wheel, dragging
+        return "click", x - 1, y - 1, bstate
+
+
+class Session:
+    """One player's game on the server.
+
+    Attributes:
+        self.reader: The stream the input comes from
+        self.writer: The stream the frames go to
+        self.screen: The screen the desk draws in
+        self.desk: The game (None before the first deal)
+        self.parser: Parser of the input
+        self.telnet: True if the client is asked for telnet character mode
+        self.name: The client's address (for the log)
+        self.running: False once the player quit
+    """
+
+    def __init__(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        telnet: bool = False,
+    ):
+        self.reader = reader
+        self.writer = writer
+        self.telnet = telnet
+        self.screen = Screen(SCREEN_ROWS, SCREEN_COLS)
+        self.desk: Desk | None = None
+        self.parser = InputParser()
+        self.name = str(writer.get_extra_info("peername") or "unix socket")
+        self.running = True
+
+    def new_deal(self, deal_number: int | None = None):
+        """Dealing a new game and drawing it (on the screen, it's sent later)
+
+        :param deal_number: The number of the deal (a random one if it's None)
+        """
+        self.screen.erase()
+        self.desk = Desk(self.screen)
+        self.desk.initialize(deal_number)
+        self.desk.init_draw()
+        # (in the same places as in the curses game, see game.draw_texts())
+        layout = self.desk.layout
+        put_text(self.screen, layout, DEAL_ROW, f"Deal #{self.desk.deal_number}")
+        put_text(self.screen, layout, TITLE_ROW, "Solitaire Game")
+        put_text(self.screen, layout, QUIT_ROW, "'q' - quit, 'n' - new deal")
+        put_text(self.screen, layout, KEYS_ROW, "'u' - undo, 'r' - redo")
+
+    def handle(self, event: tuple):
+        """Doing what the key or click asks for.
+
+        :param event: The event from InputParser.feed()
+        """
+        desk = self.desk
+        if event[0] == "click":
+            _, x, y, bstate = event
+            if desk.on_click(x, y, bstate):
+                desk.draw_changed()
+        else:
+            key = event[1]
+            if key in QUIT_KEYS:
+                self.running = False
+                return
+            if key == ord("n"):
+                self.new_deal()
+                return
+            if key in (ord("u"), ord("r")):
+                if desk.undo() if key == ord("u") else desk.redo():
+                    desk.draw_changed()
+        message = "You've won! 'n' - new deal" if desk.is_game_won() else ""
+        put_text(self.screen, desk.layout, HINT_ROW, message)  # (there are no hints here)
+
+    async def send(self, text: str):
+        if text:
+            self.writer.write(text.encode())
+            await self.writer.drain()
+
+    async def run(self):
+        """The session's event loop (until the player quits or goes away)."""
+        logger.info(f"Session started: {self.name}")
+        if self.telnet:
+            self.writer.write(TELNET_SETUP)
+        self.new_deal()
+        await self.send(START + self.screen.render())
+        while self.running:
+            try:
+                data = await asyncio.wait_for(self.reader.read(1024), IDLE_TIMEOUT)
+            except asyncio.TimeoutError:
+                logger.info(f"Session idle for too long: {self.name}")
+                break
+            if not data:
+                break  # The client went away
+            for event in self.parser.feed(data):
+                self.handle(event)
+                if not self.running:
+                    break
+            await self.send(self.screen.render())
+        await self.send(STOP)
+        logger.info(f"Session ended: {self.name}")
+
+
+class Server:
+    """Accepts the connections and runs a Session for every one of them.
+
+    Attributes:
+        self.max_sessions: How many sessions can run at once (more are turned away)
+        self.telnet: True if the clients are asked for telnet character mode
+        self.sessions: The running sessions
+    """
+
+    def __init__(self, max_sessions: int = MAX_SESSIONS, telnet: bool = True):
+        self.max_sessions = max_sessions
+        self.telnet = telnet
+        self.sessions: set[Session] = set()
+
+    async def on_connect(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        telnet: bool = True,
+    ):
+        """Running one connection's session (asyncio calls it for every connection).
+
+        :param telnet: False if the listener's clients never speak telnet (the Unix socket's)
+        """
+        if len(self.sessions) >= self.max_sessions:
+            writer.write(b"The server is full, try again later.\r\n")
+            await self._close(writer)
+            return
+        session = Session(reader, writer, self.telnet and telnet)
+        self.sessions.add(session)
+        try:
+            await session.run()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            logger.info(f"Connection lost: {session.name}")
+        except Exception as e:
+            logger.error(e, exc_info=True)
+        finally:
+            self.sessions.discard(session)
+            await self._close(writer)
+
+    @staticmethod
+    async def _close(writer: asyncio.StreamWriter):
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+
+    async def serve(self, host: str = HOST, port: int = PORT, unix: str | None = None):
+        """Serving until the process is stopped.
+
+        :param host: The address of the TCP server
+        :param port: The port of the TCP server
+        :param unix: The path of the Unix socket (used instead of TCP if it's given)
+        """
+        if unix:
+            # (netcat over the socket would show the telnet commands as garbage)
+            server = await asyncio.start_unix_server(
+                functools.partial(self.on_connect, telnet=False), unix
+            )
+        else:
+            server = await asyncio.start_server(self.on_connect, host, port)
+        where = ", ".join(str(sock.getsockname()) for sock in server.sockets)
+        logger.info(f"Serving on {where}")
+        print(f"Serving on {where} (ctrl + c to stop)")
+        async with server:
+            await server.serve_forever()
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Birbuh's Console Solitaire server")
+    parser.add_argument("--host", default=HOST, help=f"address to listen on ({HOST})")
+    parser.add_argument(
+        "-p", "--port", type=int, default=PORT, help=f"TCP port ({PORT})"
+    )
+    parser.add_argument("--unix", help="path of a Unix socket to listen on instead")
+    parser.add_argument(
+        "--max-sessions",
+        type=int,
+        default=MAX_SESSIONS,
+        help=f"how many games can run at once ({MAX_SESSIONS})",
+    )
+    parser.add_argument(
+        "--no-telnet",
+        action="store_true",
+        help="don't send telnet commands (for netcat over TCP)",
+    )
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    setup_logging()
+    palette.init_headless()  # There's no terminal to make the colors in
+    try:
+        asyncio.run(
+            Server(args.max_sessions, not args.no_telnet).serve(
+                args.host, args.port, args.unix
+            )
+        )
+    except KeyboardInterrupt:
+        sys.exit(0)
+    finally:
+        stop_logging()
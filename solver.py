@@ -0,0 +1,230 @@
+import time
+import logging
+import threading
+
+from enum import Enum
+from typing import NamedTuple
+
+from engine import (
+    GameState,
+    Move,
+    FOUNDATION,
+    WASTE,
+    STOCK,
+    RANK,
+    BLACK,
+)
+
+
+logger = logging.getLogger(__name__)
+
+# Rough size of one visited position in the transposition table (key + set slot)
+POSITION_SIZE = 160
+
+
+class SolveStatusEnum(Enum):
+    SOLVED = 0
+    UNSOLVABLE = 1  # Every position was checked, there's no way to win
+    OUT_OF_BUDGET = 2  # Node, time or memory limit was hit first
+    CANCELLED = 3  # Stopped from the outside (see Solver.solve)
+
+
+class SolveResult(NamedTuple):
+    """What the solver found.
+
+    Attributes:
+        self.status: SolveStatusEnum member
+        self.moves: Winning moves (empty if not solved)
+        self.nodes: How many positions were searched
+        self.elapsed: How long the search took (in seconds)
+    """
+
+    status: SolveStatusEnum
+    moves: list[Move]
+    nodes: int
+    elapsed: float
+
+
+def position_key(state: GameState) -> bytes:
+    """Returns the key of the position for the transposition table.
+
+    Every Tableau pile starts with its number of face down cards. The piles are
+    sorted, so the same layout in other columns counts as the same position.
+    The Foundation piles aren't needed (they hold every card that isn't anywhere else).
+
+    :param state: The game state
+    """
+    columns = sorted(
+        bytes((hidden,)) + bytes(pile)
+        for hidden, pile in zip(state.hidden, state.tableau)
+    )
+    return (
+        b"\xff".join(columns)
+        + b"\xfe"
+        + bytes(state.stock)
+        + b"\xfe"
+        + bytes(state.waste)
+    )
+
+
+def is_safe_to_foundation(state: GameState, card: int) -> bool:
+    """Checking if the card can go to the Foundation pile without losing anything.
+
+    It's safe once both cards that could be put on it in the Tableau
+    (one rank lower, other color) are already in the Foundation piles.
+
+    :param state: The game state
+    :param card: The card to check (has to fit the Foundation pile)
+    """
+    rank = RANK[card]
+    if rank <= 2:
+        return True
+    black = BLACK[card]
+    return all(
+        height >= rank - 1
+        for suit, height in enumerate(state.foundations)
+        if (suit % 2 == 1) != black
+    )
+
+
+def ordered_moves(state: GameState) -> list[Move]:
+    """Returns the moves worth searching, the most promising first.
+
+    Leaves out the moves that can't lead anywhere new (a whole pile going to
+    an empty pile, the same King going to another empty pile). If a card can
+    go safely to the Foundation pile, that's the only move returned.
+
+    :param state: The game state
+    """
+    to_foundation = []
+    turning_up = []
+    from_waste = []
+    emptying = []
+    others = []
+    stock = []
+    to_empty = set()
+
+    for move in state.legal_moves():
+        src, dst, count = move
+        if src == STOCK or dst == STOCK:
+            stock.append(move)
+            continue
+        if dst < FOUNDATION and not state.tableau[dst]:
+            # The King can go to any empty pile, trying one of them is enough
+            if (src, count) in to_empty:
+                continue
+            to_empty.add((src, count))
+        card = state.waste[-1] if src == WASTE else state.tableau[src][-count]
+        if FOUNDATION <= dst < WASTE:
+            if is_safe_to_foundation(state, card):
+                return [move]
+            to_foundation.append(move)
+        elif src == WASTE:
+            from_waste.append(move)
+        elif count == state.face_up_count(src):  # Whole face up run is moving
+            if state.hidden[src]:
+                turning_up.append(move)
+            elif state.tableau[dst]:
+                emptying.append(move)
+            # (whole pile to an empty pile changes nothing)
+        else:
+            others.append(move)
+
+    # Turning up the biggest face down piles first
+    turning_up.sort(key=lambda move: -state.hidden[move.src])
+    return to_foundation + turning_up + from_waste + emptying + others + stock
+
+
+class Solver:
+    """Depth-first search for the winning moves with a transposition table.
+
+    Attributes:
+        self.max_nodes: How many positions can be searched (None for no limit)
+        self.max_seconds: How long the search can take (None for no limit)
+        self.max_memory: How many bytes the transposition table can take (None for no limit)
+    """
+
+    def __init__(
+        self,
+        max_nodes: int | None = 1_000_000,
+        max_seconds: float | None = 10.0,
+        max_memory: int | None = 512 * 1024 * 1024,
+    ):
+        self.max_nodes = max_nodes
+        self.max_seconds = max_seconds
+        self.max_memory = max_memory
+
+    def solve(self, state: GameState, cancel: threading.Event | None = None) -> SolveResult:
+        """Searching for the winning moves.
+
+        :param state: The game state to start from (it's not changed)
+        :param cancel: The search stops soon after this gets set (for searching in a thread)
+        """
+        start = time.perf_counter()
+        max_positions = None
+        if self.max_memory is not None:
+            max_positions = self.max_memory // POSITION_SIZE
+
+        state = state.copy()
+        if state.is_won():
+            return SolveResult(SolveStatusEnum.SOLVED, [], 0, 0.0)
+
+        visited = {position_key(state)}
+        nodes = 0
+        path: list[Move] = []
+        states = [state]
+        stack = [iter(ordered_moves(state))]
+
+        while stack:
+            move = next(stack[-1], None)
+            if move is None:  # Every move from here was checked
+                stack.pop()
+                states.pop()
+                if path:
+                    path.pop()
+                continue
+
+            child = states[-1].copy()
+            child.apply(move)
+            key = position_key(child)
+            if key in visited:
+                continue
+            visited.add(key)
+            nodes += 1
+
+            if child.is_won():
+                path.append(move)
+                elapsed = time.perf_counter() - start
+                logger.debug(f"Solved in {nodes} nodes, {elapsed:.3f} s")
+                return SolveResult(SolveStatusEnum.SOLVED, path, nodes, elapsed)
+
+            # (a node takes ~0.1 ms, so a cancelled search stops within ~25 ms)
+            if cancel is not None and nodes % 256 == 0 and cancel.is_set():
+                elapsed = time.perf_counter() - start
+                return SolveResult(SolveStatusEnum.CANCELLED, [], nodes, elapsed)
+            if (
+                (self.max_nodes is not None and nodes >= self.max_nodes)
+                or (max_positions is not None and len(visited) >= max_positions)
+                or (
+                    self.max_seconds is not None
+                    and nodes % 1024 == 0
+                    and time.perf_counter() - start >= self.max_seconds
+                )
+            ):
+                elapsed = time.perf_counter() - start
+                return SolveResult(SolveStatusEnum.OUT_OF_BUDGET, [], nodes, elapsed)
+
+            path.append(move)
+            states.append(child)
+            stack.append(iter(ordered_moves(child)))
+
+        elapsed = time.perf_counter() - start
+        return SolveResult(SolveStatusEnum.UNSOLVABLE, [], nodes, elapsed)
+
+
+def solve_desk(desk, **limits) -> SolveResult:
+    """Solving the game shown on the desk (see Solver for the limits).
+
+    :param desk: The Desk to solve
+    """
+    return Solver(**limits).solve(desk.state)
@@ -0,0 +1,180 @@
+import curses
+import logging
+
+from typing import NamedTuple
+
+from palette import PaletteEnum, attr
+
+
+logger = logging.getLogger(__name__)
+
+
+##################################################################
+# Pre-rendered cards.
+#
+# Every card look is made once and kept in the cache as whole rows of
+# text, so drawing a card is one addnstr() per row (plus chgat() for the
+# colored parts) instead of one addch() per border cell.
+##################################################################
+
+CARD_WIDTH = 8
+CARD_HEIGHT = 6
+
+NUM_SYMBOLS = {1: "A", 11: "J", 12: "Q", 13: "K"}
+SUIT_SYMBOLS = {0: "♥", 1: "♠", 2: "♦", 3: "♣"}  # By CardColorEnum value
+
+
+class Sprite(NamedTuple):
+    """One pre-rendered look of a card.
+
+    Attributes:
+        self.rows: Text of every row (top border to bottom border)
+        self.fill: Attribute of the inside of the card (0 if it's not active)
+        self.spans: Colored parts as (row, column, length, attribute)
+    """
+
+    rows: tuple[str, ...]
+    fill: int
+    spans: tuple[tuple[int, int, int, int], ...]
+
+
+_sprites: dict[tuple, Sprite] = {}
+_boxes: dict[tuple, tuple[str, ...]] = {}
+
+
+def card_symbol(num: int, color: int) -> str:
+    """Returns the text of the card, like "10♥" or "K♠".
+
+    :param num: The number of the card (CardNumberEnum value)
+    :param color: The color of the card (CardColorEnum value)
+    """
+    return NUM_SYMBOLS.get(num, str(num)) + SUIT_SYMBOLS[color]
+
+
+def box_rows(height: int, inside: list[str] | None = None, width: int = CARD_WIDTH) -> list[str]:
+    """Returns the rows of a box (a card without anything drawn on it).
+
+    :param height: Height of the box (without the bottom border)
+    :param inside: Text of the rows inside the box (width - 1 long)
+    :param width: Width of the box (without the right border)
+    """
+    inner = width - 1
+    if inside is None:
+        inside = [" " * inner] * (height - 1)
+    rows = ["┌" + "─" * inner + "┐"]
+    rows.extend("│" + line + "│" for line in inside)
+    rows.append("└" + "─" * inner + "┘")
+    return rows
+
+
+def get_sprite(
+    num: int, color: int, turned: bool, active: bool, height: int, width: int = CARD_WIDTH
+) -> Sprite:
+    """Returns the card's look from the cache (making it the first time).
+
+    :param num: The number of the card (CardNumberEnum value)
+    :param color: The color of the card (CardColorEnum value)
+    :param turned: True if the card is face up
+    :param active: True if the card is active
+    :param height: Height of the card (6, or 3 for face down cards in the Tableau)
+    :param width: Width of the card (8, smaller on the compact desk, see layout.py)
+    """
+    key = (num, color, turned, active, height, width)
+    sprite = _sprites.get(key)
+    if sprite is None:
+        sprite = _sprites[key] = _render(num, color, turned, active, height, width)
+    return sprite
+
+
+def _render(num: int, color: int, turned: bool, active: bool, height: int, width: int) -> Sprite:
+    inner = width - 1
+    inside = [" " * inner for _ in range(height - 1)]
+    spans = []
+    if turned:
+        symbol = card_symbol(num, color)
+        bottom_shift = 3 if len(symbol) > 2 else 2
+        bottom_col = width - bottom_shift
+        inside[0] = symbol.ljust(inner)
+        inside[-1] = (" " * (bottom_col - 1) + symbol).ljust(inner)
+
+        red = color % 2 == 0
+        if red:
+            color = attr(PaletteEnum.ACTIVE_RED if active else PaletteEnum.RED)
+        else:
+            color = attr(PaletteEnum.ACTIVE_BLACK) if active else 0
+        if color:
+            spans.append((1, 1, len(symbol), color))
+            spans.append((height - 1, bottom_col, len(symbol), color))
+    else:
+        inside[0] = "~~~~".ljust(inner)
+        if height > 3:  # (the face down cards in the Tableau are cut in half, they don't have it)
+            inside[-1] = "~~".rjust(inner)
+
+    fill = attr(PaletteEnum.ACTIVE) if active else 0
+    return Sprite(tuple(box_rows(height, inside, width)), fill, tuple(spans))
+
+
+def get_empty_pile(
+    symbol: str = "", width: int = CARD_WIDTH, height: int = CARD_HEIGHT
+) -> tuple[str, ...]:
+    """Returns the look of an empty pile (with the symbol near the bottom).
+
+    :param symbol: The symbol shown inside (Foundation piles show their suit)
+    :param width: Width of the pile (the same as the card's)
+    :param height: Height of the pile (the same as the card's)
+    """
+    key = (symbol, width, height)
+    rows = _boxes.get(key)
+    if rows is None:
+        inner = width - 1
+        inside = [" " * inner for _ in range(height - 1)]
+        if symbol:
+            col = (width + 1) // 2 - 1
+            inside[-1] = (" " * (col - 1) + symbol).ljust(inner)
+        rows = _boxes[key] = tuple(box_rows(height, inside, width))
+    return rows
+
+
+def draw_rows(window: curses.window, y: int, x: int, rows) -> int:
+    """Drawing the rows one under the other, cutting off what's off the screen.
+
+    Returns how many rows were drawn.
+
+    :param window: The window to draw in
+    :param y: y coord of the first row
+    :param x: x coord of the rows
+    :param rows: The rows of text
+    """
+    max_y, max_x = window.getmaxyx()
+    room = max_x - x
+    if room <= 0 or x < 0:
+        return 0
+    drawn = 0
+    for i, row in enumerate(rows):
+        if y + i >= max_y:
+            break
+        if y + i < 0:
+            continue
+        try:
+            window.addnstr(y + i, x, row, room)
+        except curses.error:
+            pass  # Writing the bottom right corner moves the cursor off the screen
+        drawn += 1
+    return drawn
+
+
+def color_spans(window: curses.window, y: int, x: int, spans, rows: int):
+    """Changing the attributes of the parts of a drawn card.
+
+    :param window: The window the card is drawn in
+    :param y: y coord of the card
+    :param x: x coord of the card
+    :param spans: (row, column, length, attribute) of every part
+    :param rows: Only the parts in the first rows rows are changed (the rest is off the screen or covered)
+    """
+    for row, col, length, attr in spans:
+        if row < rows:
+            try:
+                window.chgat(y + row, x + col, length, attr)
+            except curses.error:
+                pass  # Off the screen
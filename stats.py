@@ -0,0 +1,296 @@
+import os
+import sys
+import time
+import queue
+import atexit
+import logging
+import sqlite3
+import argparse
+import threading
+
+from typing import NamedTuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from desk import Desk
+
+
+logger = logging.getLogger(__name__)
+
+
+##################################################################
+# History of the finished games (SQLite).
+#
+# The game only puts the finished game in a queue, a background thread
+# writes the queued games in batches (one transaction per batch), so
+# the game never waits for the disk. The totals (games, wins, streaks)
+# are kept up to date in their own one-row table by the same thread,
+# so the stats don't have to go through all of the games, and the best
+# times come from an index.
+#
+#     python stats.py            prints the stats
+#     SOLITAIRE_STATS=path.db    changes where they're kept
+##################################################################
+
+STATS_FILE = os.environ.get("SOLITAIRE_STATS", "stats.db")
+BATCH_SIZE = 500  # Most games written in one transaction
+BEST_TIMES = 5  # How many best times are shown
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    finished REAL NOT NULL,
+    deal INTEGER,
+    won INTEGER NOT NULL,
+    seconds REAL NOT NULL,
+    moves INTEGER NOT NULL,
+    stock_passes INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS games_won_seconds ON games (won, seconds);
+CREATE INDEX IF NOT EXISTS games_deal ON games (deal);
+CREATE TABLE IF NOT EXISTS totals (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    games INTEGER NOT NULL,
+    wins INTEGER NOT NULL,
+    won_seconds REAL NOT NULL,
+    streak INTEGER NOT NULL,
+    best_streak INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO totals VALUES (0, 0, 0, 0, 0, 0);
+"""
+
+
+class GameRecord(NamedTuple):
+    """One finished game"""
+
+    deal: int | None  # None if the game was loaded from a board
+    won: bool
+    seconds: float
+    moves: int
+    stock_passes: int
+    finished: float  # Unix time
+
+    @classmethod
+    def of_desk(cls, desk: "Desk", won: bool, seconds: float) -> "GameRecord":
+        """Returns the record of the game played on the desk
+
+        :param desk: The desk the game was played on
+        :param won: True if the game was won
+        :param seconds: How long the game took
+        """
+        return cls(
+            desk.deal_number, won, seconds, desk.moves_made, desk.stock_passes, time.time()
+        )
+
+
+class Summary(NamedTuple):
+    """Stats of all of the games"""
+
+    games: int
+    wins: int
+    won_seconds: float  # Time of all of the won games together
+    streak: int  # Wins in a row (the last games)
+    best_streak: int
+    best_times: list[tuple[float, int | None, int]]  # (seconds, deal, moves) of the fastest wins
+
+    @property
+    def win_rate(self) -> float:
+        return self.wins / self.games if self.games else 0.0
+
+    @property
+    def average_win(self) -> float:
+        return self.won_seconds / self.wins if self.wins else 0.0
+
+
+def connect(path: str) -> sqlite3.Connection:
+    """Opening the database (and making the tables if they aren't there yet)
+
+    :param path: The database file
+    """
+    connection = sqlite3.connect(path, timeout=10)
+    connection.execute("PRAGMA journal_mode=WAL")  # Reading doesn't wait for writing
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def write_games(connection: sqlite3.Connection, records: list[GameRecord]):
+    """Writing the games and updating the totals (in one transaction).
+
+    :param connection: The database
+    :param records: The finished games, oldest first
+    """
+    with connection:
+        games, wins, won_seconds, streak, best_streak = connection.execute(
+            "SELECT games, wins, won_seconds, streak, best_streak FROM totals"
+        ).fetchone()
+        for record in records:
+            games += 1
+            if record.won:
+                wins += 1
+                won_seconds += record.seconds
+                streak += 1
+                best_streak = max(best_streak, streak)
+            else:
+                streak = 0
+        connection.executemany(
+            "INSERT INTO games (finished, deal, won, seconds, moves, stock_passes) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (r.finished, r.deal, int(r.won), r.seconds, r.moves, r.stock_passes)
+                for r in records
+            ],
+        )
+        connection.execute(
+            "UPDATE totals SET games = ?, wins = ?, won_seconds = ?, streak = ?, best_streak = ?",
+            (games, wins, won_seconds, streak, best_streak),
+        )
+
+
+def read_summary(connection: sqlite3.Connection, best: int = BEST_TIMES) -> Summary:
+    """Returns the stats (the totals and the best times, no going through all of the games)
+
+    :param connection: The database
+    :param best: How many best times are returned
+    """
+    totals = connection.execute(
+        "SELECT games, wins, won_seconds, streak, best_streak FROM totals"
+    ).fetchone()
+    best_times = connection.execute(
+        "SELECT seconds, deal, moves FROM games WHERE won = 1 ORDER BY seconds LIMIT ?",
+        (best,),
+    ).fetchall()
+    return Summary(*totals, best_times)
+
+
+class StatsStore:
+    """Writes the finished games to the database in a background thread.
+
+    Attributes:
+        self.path: The database file
+        self.records: Games waiting to be written (None stops the writer)
+        self.thread: The writer thread (None if it's not running)
+    """
+
+    def __init__(self, path: str = STATS_FILE):
+        self.path = path
+        self.records: queue.Queue[GameRecord | None] = queue.Queue()
+        self.thread: threading.Thread | None = None
+
+    def start(self):
+        """Starting the writer thread (if it's not running yet)."""
+        if self.thread is None:
+            self.thread = threading.Thread(
+                target=self._write_loop, name="stats-writer", daemon=True
+            )
+            self.thread.start()
+
+    def record(self, record: GameRecord):
+        """Queueing the finished game (it's written soon after, never blocks)
+
+        :param record: The finished game
+        """
+        self.start()
+        self.records.put(record)
+
+    def flush(self):
+        """Waiting until all of the queued games are written."""
+        if self.thread is not None:
+            self.records.join()
+
+    def close(self):
+        """Writing the queued games and stopping the writer."""
+        if self.thread is None:
+            return
+        self.records.put(None)
+        self.thread.join()
+        self.thread = None
+
+    def summary(self, best: int = BEST_TIMES) -> Summary:
+        """Returns the stats (with the queued games written first)
+
+        :param best: How many best times are returned
+        """
+        self.flush()
+        connection = connect(self.path)
+        try:
+            return read_summary(connection, best)
+        finally:
+            connection.close()
+
+    def _write_loop(self):
+        try:
+            connection = connect(self.path)
+        except sqlite3.Error as e:
+            logger.error(f"Can't open the stats ({self.path}): {e}")
+            connection = None
+        running = True
+        while running:
+            batch = [self.records.get()]
+            # Everything that's queued by now goes in the same transaction
+            while len(batch) < BATCH_SIZE:
+                try:
+                    batch.append(self.records.get_nowait())
+                except queue.Empty:
+                    break
+            records = [record for record in batch if record is not None]
+            running = len(records) == len(batch)
+            if records and connection is not None:
+                try:
+                    write_games(connection, records)
+                except sqlite3.Error as e:
+                    logger.error(f"Can't save {len(records)} games in the stats: {e}")
+            for _ in batch:
+                self.records.task_done()
+        if connection is not None:
+            connection.close()
+
+
+_store: StatsStore | None = None
+
+
+def get_store() -> StatsStore:
+    """Returns the stats store of the program (closed at exit)"""
+    global _store
+    if _store is None:
+        _store = StatsStore()
+        atexit.register(_store.close)
+    return _store
+
+
+def report_lines(summary: Summary) -> list[str]:
+    """Returns the stats as lines of text (for the stats screen and the report)
+
+    :param summary: The stats
+    """
+    lines = [
+        f"games played: {summary.games}",
+        f"games won: {summary.wins} ({summary.win_rate:.1%})",
+        f"average win: {format_time(summary.average_win)}",
+        f"win streak: {summary.streak} (best: {summary.best_streak})",
+    ]
+    if summary.best_times:
+        lines.append("best times:")
+        for i, (seconds, deal, moves) in enumerate(summary.best_times, 1):
+            deal_text = f"deal #{deal}" if deal is not None else "loaded game"
+            lines.append(f"  {i}. {format_time(seconds)} - {deal_text}, {moves} moves")
+    return lines
+
+
+def format_time(seconds: float) -> str:
+    return f"{int(seconds) // 60}:{int(seconds) % 60:02d}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stats of the played games")
+    parser.add_argument("--db", default=STATS_FILE, help=f"the stats file ({STATS_FILE})")
+    parser.add_argument(
+        "--best", type=int, default=BEST_TIMES, help="how many best times to show"
+    )
+    args = parser.parse_args()
+    if not os.path.exists(args.db):
+        sys.exit(f"No games played yet ({args.db} doesn't exist)")
+    began = time.perf_counter()
+    result = StatsStore(args.db).summary(args.best)
+    took = time.perf_counter() - began
+    print("\n".join(report_lines(result)))
+    print(f"(read in {took * 1000:.1f} ms)")
@@ -0,0 +1,182 @@
+import os
+import sys
+import csv
+import json
+import logging
+import argparse
+import multiprocessing
+
+from engine import GameState, shuffled_deck
+from solver import Solver, SolveStatusEnum
+
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ["seed", "solvable", "status", "nodes", "seconds"]
+STATUSES = {status.name.lower() for status in SolveStatusEnum}
+
+# Solver used by every worker process (made once per process)
+_solver: Solver | None = None
+
+
+def _init_worker(max_nodes, max_seconds, max_memory):
+    global _solver
+    _solver = Solver(max_nodes, max_seconds, max_memory)
+
+
+def solve_seed(seed: int) -> dict:
+    """Dealing the cards for the seed and solving them (runs in a worker process).
+
+    :param seed: The seed of the deal (see engine.shuffled_deck)
+    """
+    solver = _solver or Solver()
+    result = solver.solve(GameState.deal(shuffled_deck(seed)))
+    if result.status == SolveStatusEnum.SOLVED:
+        solvable = True
+    elif result.status == SolveStatusEnum.UNSOLVABLE:
+        solvable = False
+    else:
+        solvable = None  # Don't know
+    return {
+        "seed": seed,
+        "solvable": solvable,
+        "status": result.status.name.lower(),
+        "nodes": result.nodes,
+        "seconds": round(result.elapsed, 4),
+    }
+
+
+def read_done_seeds(path: str) -> set[int]:
+    """Returns the seeds that are already in the output file (for resuming).
+
+    :param path: The output file (CSV or JSONL)
+    """
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as file:
+        if path.endswith(".jsonl"):
+            for line in file:
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    continue  # Line cut in half by the interruption
+                if row.get("status") in STATUSES:
+                    done.add(row["seed"])
+        else:
+            for row in csv.DictReader(file):
+                if row.get("status") in STATUSES and row.get("seconds"):
+                    done.add(int(row["seed"]))
+    return done
+
+
+class ResultWriter:
+    """Writes the results to a CSV or JSONL file (picked by the extension).
+
+    Attributes:
+        self.file: The output file (opened for appending)
+        self.jsonl: True if it's a JSONL file
+        self.flush_every: How many results are written before flushing the file
+        self.written: How many results were written so far
+    """
+
+    def __init__(self, path: str, flush_every: int = 100):
+        self.jsonl = path.endswith(".jsonl")
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        if not new_file:
+            with open(path, "rb") as file:
+                file.seek(-1, os.SEEK_END)
+                cut_line = file.read(1) != b"\n"
+        self.file = open(path, "a", encoding="utf-8", newline="")
+        if not new_file and cut_line:  # The last sweep was killed mid-line
+            self.file.write("\n")
+        self.flush_every = flush_every
+        self.written = 0
+        if not self.jsonl:
+            self.csv = csv.DictWriter(self.file, FIELDS)
+            if new_file:
+                self.csv.writeheader()
+
+    def write(self, result: dict):
+        if self.jsonl:
+            self.file.write(json.dumps(result) + "\n")
+        else:
+            row = dict(result)
+            row["solvable"] = "" if result["solvable"] is None else int(result["solvable"])
+            self.csv.writerow(row)
+        self.written += 1
+        if self.written % self.flush_every == 0:
+            self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def sweep(
+    start: int,
+    end: int,
+    path: str,
+    jobs: int | None = None,
+    max_nodes: int | None = 1_000_000,
+    max_seconds: float | None = 10.0,
+    max_memory: int | None = 512 * 1024 * 1024,
+    chunksize: int = 16,
+) -> int:
+    """Solving every deal from start to end (end not included) in a process pool.
+
+    The results are written as soon as they come (in any order), seeds that are
+    already in the output file are skipped. Returns how many deals were checked now.
+
+    :param start: The first seed
+    :param end: The seed after the last one
+    :param path: The output file (.csv or .jsonl)
+    :param jobs: How many processes to use (all cores by default)
+    :param chunksize: How many seeds are sent to a worker at once
+    """
+    done = read_done_seeds(path)
+    seeds = (seed for seed in range(start, end) if seed not in done)
+    logger.info(f"Sweep {start}-{end}: {len(done)} seeds already done")
+
+    writer = ResultWriter(path)
+    count = 0
+    try:
+        with multiprocessing.Pool(
+            jobs, _init_worker, (max_nodes, max_seconds, max_memory)
+        ) as pool:
+            for result in pool.imap_unordered(solve_seed, seeds, chunksize):
+                writer.write(result)
+                count += 1
+    finally:
+        writer.close()
+    return count
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(
+        description="Check which deals can be won (solver sweep over seeds)."
+    )
+    parser.add_argument("start", type=int, help="first seed")
+    parser.add_argument("end", type=int, help="seed after the last one")
+    parser.add_argument("-o", "--output", default="sweep.csv", help=".csv or .jsonl file")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="worker processes")
+    parser.add_argument("--max-nodes", type=int, default=1_000_000)
+    parser.add_argument("--max-seconds", type=float, default=10.0)
+    parser.add_argument("--max-memory-mb", type=int, default=512)
+    parser.add_argument("--chunksize", type=int, default=16)
+    args = parser.parse_args(argv)
+
+    count = sweep(
+        args.start,
+        args.end,
+        args.output,
+        args.jobs,
+        args.max_nodes,
+        args.max_seconds,
+        args.max_memory_mb * 1024 * 1024,
+        args.chunksize,
+    )
+    print(f"{count} deals checked, results in {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()